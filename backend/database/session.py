@@ -3,6 +3,7 @@ SQLAlchemy Database Session Module for RecipeRAG
 Handles database connections for profile and other SQLAlchemy-based models
 """
 import os
+import orjson
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -17,13 +18,21 @@ DATABASE_URL = os.getenv("NEON_DB_URL")
 if not DATABASE_URL:
     raise ValueError("Database connection URL is required in NEON_DB_URL environment variable")
 
-# Create engine with connection pooling
+def _json_serializer(obj) -> str:
+    """Serialize JSON columns with orjson, which handles datetime values natively."""
+    return orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS).decode()
+
+# Create engine with connection pooling; sizes and recycling are tunable per deployment.
+# Pre-ping stays on by default because Neon closes connections when compute suspends,
+# but can be disabled where the database is always on to save a round trip per checkout.
 engine = create_engine(
     DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_pre_ping=True,  # Verify connections before use
-    pool_recycle=300,    # Recycle connections every 5 minutes
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "1") == "1",  # Verify connections before use
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "300")),    # Recycle connections every 5 minutes
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
 )
 
 # Create session factory
@@ -42,6 +51,19 @@ def get_db():
     finally:
         db.close()
 
+def commit_without_expiring(db):
+    """
+    Commit a session without expiring the instances it has loaded, for callers whose
+    objects are already current (e.g. loaded via RETURNING). The session's own
+    expire_on_commit setting is restored afterwards, so later commits are unaffected.
+    """
+    previous = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = previous
+
 def create_tables():
     """
     Create all tables defined in SQLAlchemy models
@@ -0,0 +1,7 @@
+-- Migration script to add a composite index for listing a user's chat sessions
+-- Supports WHERE user_id = ? ORDER BY created_at DESC [LIMIT n] as an index range scan
+
+CREATE INDEX IF NOT EXISTS ix_chat_sessions_user_created ON chat_sessions (user_id, created_at DESC);
+
+-- session_id is already covered by the unique index created with the table
+-- (unique=True, index=True on the model), so no additional constraint is needed.
@@ -0,0 +1,5 @@
+-- Migration script to ensure the HNSW index used by RAG recipe retrieval exists
+-- Supports ORDER BY embedding <=> $1 LIMIT n as an approximate nearest-neighbour scan
+-- (databases initialized by core.database.DatabaseManager already have it)
+
+CREATE INDEX IF NOT EXISTS idx_recipes_embedding_cosine ON recipes USING hnsw (embedding vector_cosine_ops);
@@ -0,0 +1,19 @@
+-- Migration script to add a precomputed summary_text column to chat_sessions
+-- History list endpoints read this column instead of deserializing messages_history
+
+-- Add summary_text column (nullable, populated on every save)
+ALTER TABLE chat_sessions ADD COLUMN IF NOT EXISTS summary_text VARCHAR;
+
+-- Backfill existing records from the first user message (first line, capped at 50 characters)
+UPDATE chat_sessions cs
+SET summary_text = (
+    SELECT CASE
+        WHEN length(split_part(msg->>'content', E'\n', 1)) > 50
+            THEN left(split_part(msg->>'content', E'\n', 1), 50) || '...'
+        ELSE split_part(msg->>'content', E'\n', 1)
+    END
+    FROM json_array_elements(cs.messages_history::json) AS msg
+    WHERE msg->>'sender' = 'user'
+    LIMIT 1
+)
+WHERE cs.summary_text IS NULL;
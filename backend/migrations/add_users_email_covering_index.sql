@@ -0,0 +1,6 @@
+-- Migration script to add a covering index for auth lookups by email
+-- Lets SELECT user_id, is_verified, provider FROM users WHERE email = ? run as an
+-- index-only scan (see get_user_auth_row in services/user_service.py)
+
+-- CONCURRENTLY avoids locking users against writes; run outside a transaction block
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_email_cover ON users (email) INCLUDE (user_id, is_verified, provider);
@@ -0,0 +1,6 @@
+-- Migration script to store profile preferences as JSONB instead of JSON
+-- JSONB is kept in a parsed binary form and supports the || merge used by profile upserts
+
+ALTER TABLE users_profiles
+    ALTER COLUMN preferences TYPE JSONB USING preferences::jsonb,
+    ALTER COLUMN preferences SET DEFAULT '{}'::jsonb;
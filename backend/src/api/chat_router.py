@@ -240,9 +240,9 @@ async def chat(
 
 
 @router.get("/chat/history")
-async def get_chat_history(current_user_id: Optional[str] = Depends(get_current_user_id)):
+async def get_chat_history(limit: Optional[int] = None, current_user_id: Optional[str] = Depends(get_current_user_id)):
     """
-    Get the chat history for the current user.
+    Get the chat history for the current user, optionally limited to the newest `limit` sessions.
     """
     if not current_user_id:
         from fastapi import HTTPException
@@ -250,7 +250,7 @@ async def get_chat_history(current_user_id: Optional[str] = Depends(get_current_
 
     try:
         from src.services.chat_history_service import chat_history_service
-        history = chat_history_service.get_user_chat_history(current_user_id)
+        history = chat_history_service.get_user_chat_history(current_user_id, limit=limit)
         return {"success": True, "history": history}
     except Exception as e:
         from fastapi import HTTPException
@@ -358,10 +358,10 @@ async def _extract_recipe_from_response(response: str):
     """
     try:
         # Import the recipe extraction service
-        from src.services.recipe_extraction_service import recipe_extraction_service
+        from src.services.recipe_extraction_service import get_recipe_extraction_service
         
         # Use the AI service to extract structured recipe data
-        recipe_data = await recipe_extraction_service.extract_recipe_from_text(response)
+        recipe_data = await get_recipe_extraction_service().extract_recipe_from_text(response)
         
         # Map the fields to match the expected format in the rest of the code
         result = {
@@ -1020,10 +1020,10 @@ async def extract_recipe_from_text(request: Request):
             raise HTTPException(status_code=400, detail="Text content is required")
 
         # Import the recipe extraction service
-        from src.services.recipe_extraction_service import recipe_extraction_service
+        from src.services.recipe_extraction_service import get_recipe_extraction_service
 
         # Use the AI service to extract structured recipe data
-        recipe_data = await recipe_extraction_service.extract_recipe_from_text(text_content)
+        recipe_data = await get_recipe_extraction_service().extract_recipe_from_text(text_content)
 
         return recipe_data
 
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 from database.session import get_db
-from src.services.user_service import get_user_by_email, create_user, update_user_provider_info
+from src.services.user_service import get_user_by_email, get_user_auth_row, create_user, update_user_provider_info
 import hashlib
 import bcrypt
 import logging
@@ -206,8 +206,8 @@ async def forgot_password(
         if not email:
             raise HTTPException(status_code=400, detail="Email is required")
 
-        # Find user by email
-        user = get_user_by_email(db, email)
+        # Find user by email (only the provider is needed here)
+        user = get_user_auth_row(db, email)
 
         if not user:
             # User doesn't exist
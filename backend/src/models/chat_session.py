@@ -1,16 +1,23 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Index, desc
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database.session import Base
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        # Supports "sessions for a user, newest first" as an index range scan
+        Index('ix_chat_sessions_user_created', 'user_id', desc('created_at')),
+    )
+    # Populate server-generated created_at/updated_at from INSERT/UPDATE ... RETURNING
+    __mapper_args__ = {'eager_defaults': True}
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, index=True, nullable=False)  # Foreign Key to user
     session_id = Column(String, unique=True, index=True, nullable=False)
     messages_history = Column(JSON, nullable=False)  # Array of message objects
     recipe_context = Column(JSON, nullable=True)  # Associated recipe data and preferences
+    summary_text = Column(String, nullable=True)  # First user message, precomputed for history lists
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from database.session import Base
 
@@ -7,7 +8,7 @@ class UserProfile(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, unique=True, index=True, nullable=False)
-    preferences = Column(JSON, nullable=False)  # JSONB field for flexible storage
+    preferences = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))  # JSONB field for flexible storage
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
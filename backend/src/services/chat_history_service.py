@@ -16,23 +16,19 @@ class ChatHistoryService:
     def __init__(self):
         self.chat_session_service = chat_session_service
 
-    def get_user_chat_history(self, user_id: str) -> List[Dict[str, Any]]:
+    def get_user_chat_history(self, user_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Get all chat sessions for a user as a history list.
+        Get chat sessions for a user as a history list, newest first.
 
         Args:
             user_id: The user ID
+            limit: Maximum number of sessions to return (None for all)
 
         Returns:
             List of session summaries for the user's chat history
         """
         try:
-            sessions = self.chat_session_service.get_user_sessions(user_id)
-
-            history_list = []
-            for session in sessions:
-                summary = self.chat_session_service.get_session_summary(session)
-                history_list.append(summary)
+            history_list = self.chat_session_service.get_user_session_summaries(user_id, limit=limit)
 
             logger.info(f"Retrieved {len(history_list)} chat history items for user {user_id}")
             return history_list
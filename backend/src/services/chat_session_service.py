@@ -1,9 +1,13 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import json
 import logging
+import os
+import time
+import uuid
 
 from src.models.chat_session import ChatSession
 from src.models.user import User
@@ -12,6 +16,21 @@ from database.session import get_db
 
 logger = logging.getLogger(__name__)
 
+
+def _new_session_id() -> str:
+    """
+    Generate a time-ordered UUIDv7 string for a new session.
+
+    The millisecond timestamp prefix keeps inserts on the session_id index sequential,
+    and the random bits keep concurrent requests from colliding.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand_a = int.from_bytes(os.urandom(2), 'big') & 0x0FFF
+    rand_b = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+    value = (timestamp_ms & ((1 << 48) - 1)) << 80 | 0x7 << 76 | rand_a << 64 | 0b10 << 62 | rand_b
+    return str(uuid.UUID(int=value))
+
+
 class ChatSessionService:
     """
     Service class for managing chat sessions including both guest and registered users.
@@ -21,19 +40,15 @@ class ChatSessionService:
     def __init__(self):
         pass
 
-    def _convert_datetime(self, obj):
-        """Recursively convert datetime objects to ISO format strings for JSON serialization."""
-        import json
-        from datetime import datetime
-
-        if isinstance(obj, dict):
-            return {key: self._convert_datetime(value) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_datetime(item) for item in obj]
-        elif isinstance(obj, datetime):
-            return obj.isoformat()
-        else:
-            return obj
+    def _build_summary_text(self, messages_history: Optional[List[Dict]]) -> Optional[str]:
+        """Return the first line of the first user message (max 50 characters), or None."""
+        for msg in messages_history or []:
+            if msg.get('sender') == 'user':
+                content = msg.get('content', '')
+                # Take the first line or first 50 characters
+                first_line = content.split('\n')[0] if '\n' in content else content
+                return first_line[:50] + "..." if len(first_line) > 50 else first_line
+        return None
 
     def create_new_session(self, user_id: Optional[str] = None, session_id: Optional[str] = None) -> ChatSession:
         """
@@ -47,18 +62,19 @@ class ChatSessionService:
             The created ChatSession object
         """
         db = next(get_db())
+        # Keep the committed object loaded so it can be returned without a refresh SELECT
+        db.expire_on_commit = False
         try:
             # Create a new chat session record
             chat_session = ChatSession(
                 user_id=user_id or "guest",  # Use "guest" as a placeholder for guest sessions
-                session_id=session_id or f"session_{datetime.utcnow().timestamp()}",
+                session_id=session_id or _new_session_id(),
                 messages_history=[],
                 recipe_context={}
             )
 
             db.add(chat_session)
             db.commit()
-            db.refresh(chat_session)
 
             logger.info(f"Created new chat session for user {user_id or 'guest'} with session_id {chat_session.session_id}")
             return chat_session
@@ -83,10 +99,11 @@ class ChatSessionService:
             The saved ChatSession object
         """
         db = next(get_db())
+        # Keep the committed object loaded so it can be returned without a refresh SELECT
+        db.expire_on_commit = False
         try:
-            # Convert the messages_history and recipe_context to ensure JSON serializability
-            serializable_messages_history = self._convert_datetime(messages_history)
-            serializable_recipe_context = self._convert_datetime(recipe_context)
+            # datetime values are serialized natively by the engine's orjson JSON serializer
+            summary_text = self._build_summary_text(messages_history)
 
             # Check if session already exists
             existing_session = db.query(ChatSession).filter(
@@ -98,12 +115,12 @@ class ChatSessionService:
 
             if existing_session:
                 # Update existing session
-                existing_session.messages_history = serializable_messages_history
-                existing_session.recipe_context = serializable_recipe_context
+                existing_session.messages_history = messages_history
+                existing_session.recipe_context = recipe_context
+                existing_session.summary_text = summary_text
                 existing_session.updated_at = datetime.utcnow()
 
                 db.commit()
-                db.refresh(existing_session)
 
                 logger.info(f"Updated existing chat session {session_id} for user {user_id}")
                 return existing_session
@@ -112,13 +129,13 @@ class ChatSessionService:
                 chat_session = ChatSession(
                     user_id=user_id,
                     session_id=session_id,
-                    messages_history=serializable_messages_history,
-                    recipe_context=serializable_recipe_context
+                    messages_history=messages_history,
+                    recipe_context=recipe_context,
+                    summary_text=summary_text
                 )
 
                 db.add(chat_session)
                 db.commit()
-                db.refresh(chat_session)
 
                 logger.info(f"Created new chat session {session_id} for user {user_id}")
                 return chat_session
@@ -129,9 +146,127 @@ class ChatSessionService:
         finally:
             db.close()
 
+    def _prepare_bulk_rows(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Normalize session dictionaries into insertable rows with a precomputed summary_text."""
+        return [
+            {
+                'user_id': row['user_id'],
+                'session_id': row['session_id'],
+                'messages_history': row.get('messages_history') or [],
+                'recipe_context': row.get('recipe_context') or {},
+                'summary_text': self._build_summary_text(row.get('messages_history')),
+            }
+            for row in rows
+        ]
+
+    def save_sessions_bulk(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert multiple new chat sessions in a single executemany round-trip.
+
+        Args:
+            rows: Session dictionaries with user_id, session_id, messages_history and recipe_context
+
+        Returns:
+            The number of sessions inserted
+        """
+        if not rows:
+            return 0
+
+        db = next(get_db())
+        try:
+            db.execute(insert(ChatSession), self._prepare_bulk_rows(rows))
+            db.commit()
+            logger.info(f"Bulk inserted {len(rows)} chat sessions")
+            return len(rows)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error bulk inserting chat sessions: {e}")
+            raise
+        finally:
+            db.close()
+
+    def save_or_update_sessions_bulk(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert or update multiple chat sessions with one INSERT ... ON CONFLICT (session_id) DO UPDATE.
+
+        The unique constraint on session_id is checked server-side, replacing the
+        per-row existence check done by save_session_to_db.
+
+        Args:
+            rows: Session dictionaries with user_id, session_id, messages_history and recipe_context
+
+        Returns:
+            The number of sessions inserted or updated; sessions whose session_id already
+            belongs to a different user are left untouched and not counted
+        """
+        if not rows:
+            return 0
+
+        db = next(get_db())
+        try:
+            stmt = pg_insert(ChatSession).values(self._prepare_bulk_rows(rows))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ChatSession.session_id],
+                set_={
+                    'messages_history': stmt.excluded.messages_history,
+                    'recipe_context': stmt.excluded.recipe_context,
+                    'summary_text': stmt.excluded.summary_text,
+                    'updated_at': func.now(),
+                },
+                where=ChatSession.user_id == stmt.excluded.user_id
+            )
+            result = db.execute(stmt)
+            db.commit()
+
+            # Rows whose session_id belongs to another user are skipped by the WHERE clause
+            written = result.rowcount
+            if written < len(rows):
+                logger.warning(f"Skipped {len(rows) - written} chat sessions owned by other users")
+            logger.info(f"Bulk saved {written} chat sessions")
+            return written
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error bulk saving chat sessions: {e}")
+            raise
+        finally:
+            db.close()
+
+    def list_user_sessions(self, user_id: str, limit: Optional[int] = None) -> List[Any]:
+        """
+        List a user's chat sessions as lightweight Core rows for list endpoints.
+
+        Returns (session_id, created_at, updated_at) rows without ORM hydration,
+        identity-map bookkeeping or decoding of the JSON columns.
+
+        Args:
+            user_id: The user ID
+            limit: Maximum number of sessions to return (None for all)
+
+        Returns:
+            List of rows with session_id, created_at and updated_at, newest first
+        """
+        db = next(get_db())
+        try:
+            rows = db.execute(
+                select(ChatSession.session_id, ChatSession.created_at, ChatSession.updated_at)
+                .where(ChatSession.user_id == user_id)
+                .order_by(ChatSession.created_at.desc())
+                .limit(limit)
+            ).all()
+            logger.info(f"Listed {len(rows)} sessions for user {user_id}")
+            return rows
+        except Exception as e:
+            logger.error(f"Error listing user sessions: {e}")
+            raise
+        finally:
+            db.close()
+
     def get_user_sessions(self, user_id: str) -> List[ChatSession]:
         """
-        Get all chat sessions for a user.
+        Get all chat sessions for a user as full ORM objects.
+
+        Detail use only: this loads and decodes every session's messages_history.
+        List views should use list_user_sessions or get_user_session_summaries.
 
         Args:
             user_id: The user ID
@@ -141,7 +276,8 @@ class ChatSessionService:
         """
         db = next(get_db())
         try:
-            sessions = db.query(ChatSession).filter(ChatSession.user_id == user_id).order_by(ChatSession.created_at.desc()).all()
+            # Sessions are returned detached, so forbid lazy relationship loads outright
+            sessions = db.query(ChatSession).options(raiseload('*')).filter(ChatSession.user_id == user_id).order_by(ChatSession.created_at.desc()).all()
             logger.info(f"Retrieved {len(sessions)} sessions for user {user_id}")
             return sessions
         except Exception as e:
@@ -150,6 +286,50 @@ class ChatSessionService:
         finally:
             db.close()
 
+    def get_user_session_summaries(self, user_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get session summaries for a user's history list without loading full sessions.
+
+        Only the columns needed for the list are selected, so messages_history is never
+        deserialized and no ORM objects are hydrated.
+
+        Args:
+            user_id: The user ID
+            limit: Maximum number of sessions to return (None for all)
+
+        Returns:
+            List of session summary dictionaries, newest first
+        """
+        db = next(get_db())
+        try:
+            rows = db.query(
+                ChatSession.session_id,
+                ChatSession.created_at,
+                ChatSession.updated_at,
+                func.json_array_length(ChatSession.messages_history),
+                ChatSession.summary_text,
+                ChatSession.recipe_context
+            ).filter(ChatSession.user_id == user_id).order_by(ChatSession.created_at.desc()).limit(limit).all()
+
+            summaries = [
+                {
+                    'session_id': session_id,
+                    'created_at': created_at.isoformat() if created_at else None,
+                    'updated_at': updated_at.isoformat() if updated_at else None,
+                    'message_count': message_count or 0,
+                    'summary': summary_text or "New conversation",
+                    'recipe_context': recipe_context
+                }
+                for session_id, created_at, updated_at, message_count, summary_text, recipe_context in rows
+            ]
+            logger.info(f"Retrieved {len(summaries)} session summaries for user {user_id}")
+            return summaries
+        except Exception as e:
+            logger.error(f"Error retrieving user session summaries: {e}")
+            raise
+        finally:
+            db.close()
+
     def get_session_by_id(self, session_id: str) -> Optional[ChatSession]:
         """
         Get a chat session by its ID.
@@ -162,7 +342,7 @@ class ChatSessionService:
         """
         db = next(get_db())
         try:
-            session = db.query(ChatSession).filter(ChatSession.session_id == session_id).first()
+            session = db.query(ChatSession).options(raiseload('*')).filter(ChatSession.session_id == session_id).first()
             return session
         except Exception as e:
             logger.error(f"Error retrieving session by ID {session_id}: {e}")
@@ -182,13 +362,14 @@ class ChatSessionService:
         """
         db = next(get_db())
         try:
-            session = db.query(ChatSession).filter(ChatSession.session_id == session_id).first()
-            if session:
-                db.delete(session)
-                db.commit()
+            # Single DELETE round-trip instead of SELECT followed by DELETE
+            deleted = db.query(ChatSession).filter(
+                ChatSession.session_id == session_id
+            ).delete(synchronize_session=False)
+            db.commit()
+            if deleted:
                 logger.info(f"Deleted session {session_id}")
-                return True
-            return False
+            return deleted > 0
         except Exception as e:
             db.rollback()
             logger.error(f"Error deleting session {session_id}: {e}")
@@ -208,11 +389,12 @@ class ChatSessionService:
         """
         db = next(get_db())
         try:
-            sessions = db.query(ChatSession).filter(ChatSession.user_id == user_id).all()
-            for session in sessions:
-                db.delete(session)
+            # Single DELETE round-trip instead of SELECT followed by DELETE
+            deleted = db.query(ChatSession).filter(
+                ChatSession.user_id == user_id
+            ).delete(synchronize_session=False)
             db.commit()
-            logger.info(f"Deleted all {len(sessions)} sessions for user {user_id}")
+            logger.info(f"Deleted all {deleted} sessions for user {user_id}")
             return True
         except Exception as e:
             db.rollback()
@@ -231,20 +413,8 @@ class ChatSessionService:
         Returns:
             Dictionary with session summary information
         """
-        # Get the first message or a default message
-        first_message = "New conversation"
-        if session.messages_history and len(session.messages_history) > 0:
-            # Find the first user message in the history
-            for msg in session.messages_history:
-                if msg.get('sender') == 'user':
-                    content = msg.get('content', '')
-                    # Take the first line or first 50 characters
-                    first_line = content.split('\n')[0] if '\n' in content else content
-                    first_message = first_line[:50] + "..." if len(first_line) > 50 else first_line
-                    break
-
-        # Ensure recipe_context is JSON serializable
-        serializable_recipe_context = self._convert_datetime(session.recipe_context)
+        # Get the first user message or a default message
+        first_message = session.summary_text or self._build_summary_text(session.messages_history) or "New conversation"
 
         return {
             'session_id': session.session_id,
@@ -252,7 +422,7 @@ class ChatSessionService:
             'updated_at': session.updated_at.isoformat() if session.updated_at else None,
             'message_count': len(session.messages_history) if session.messages_history else 0,
             'summary': first_message,
-            'recipe_context': serializable_recipe_context
+            'recipe_context': session.recipe_context
         }
 
 
@@ -2,12 +2,31 @@
 Domain Guardrails Service for RecipeRAG AI Assistant
 Implements strict enforcement of food/cooking domain boundaries
 """
+import functools
 import re
-from typing import Tuple
+from typing import FrozenSet, Iterable, Optional, Set, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Word tokens as they appear in keywords such as 'c++', 'c#', 'next.js' or 'tcp/ip'
+_TOKEN_RE = re.compile(r'[a-z][a-z\.\+\#/]*')
+
+# Redirect message for off-topic queries; {query} is the user's original query
+_THEMATIC_RESPONSE_TEMPLATE = (
+    "👨‍🍳 Hello! I'm your RecipeRAG culinary assistant, focused exclusively on cooking, recipes, and food! 🍳\n\n"
+    "I can't help with that particular question, but I'd love to help you create something delicious instead! 😊\n\n"
+    "💡 You asked: \"{query}\"\n\n"
+    "🍽️ I specialize in helping with:\n"
+    "• Recipe suggestions based on your ingredients\n"
+    "• Cooking techniques and tips\n"
+    "• Meal planning and nutrition\n"
+    "• Ingredient substitutions\n"
+    "• Dietary restrictions and preferences\n\n"
+    "So, what ingredients do you have on hand? Or what kind of dish are you craving today? "
+    "I can suggest amazing recipes based on what you're looking for! 🍴✨"
+)
+
 class DomainGuardrails:
     """
     Service to enforce strict domain boundaries for the RecipeRAG AI Assistant
@@ -123,20 +142,9 @@ class DomainGuardrails:
             'what does.*stand for', 'what is the abbreviation for', 'acronym for',
         ]
 
-    def check_query_domain(self, message: str) -> Tuple[bool, str]:
-        """
-        Check if the query is within the food/cooking domain
-
-        Args:
-            message: The user query to check
-
-        Returns:
-            Tuple of (is_within_domain: bool, reason: str)
-        """
-        message_lower = message.lower().strip()
-
-        # Check if the query is related to food/cooking first to avoid false positives
-        food_related_indicators = [
+        # Indicators that the query is related to food/cooking, used to avoid false positives.
+        # These are stems ('cook' should also match 'cooking'), so they match as substrings.
+        self.food_related_indicators = [
             'recipe', 'cook', 'food', 'eat', 'meal', 'dish', 'ingredient', 'kitchen',
             'baking', 'roasting', 'grilling', 'boiling', 'frying', 'seasoning', 'spice',
             'herb', 'flavor', 'taste', 'cuisine', 'nutrition', 'diet', 'healthy',
@@ -145,36 +153,8 @@ class DomainGuardrails:
             'pasta', 'rice', 'bread', 'soup', 'salad', 'sauce', 'oil', 'salt', 'pepper'
         ]
 
-        is_food_related = any(indicator in message_lower for indicator in food_related_indicators)
-
-        # Check for technical terms, but allow them if the query is clearly food-related
-        for tech_term in self.tech_keywords:
-            # Skip technical terms if they appear in a food context
-            if tech_term in message_lower:
-                # Check if this appears in a food-related context (e.g., "HTML in a recipe title")
-                if is_food_related:
-                    # Check if tech term appears in a context that suggests it's food-related
-                    # For example, if "HTML" appears with cooking terms, it might be a typo for something food-related
-                    continue
-                else:
-                    return False, f"Technical term detected: '{tech_term}'"
-
-        # Check for non-food category terms
-        for category_term in self.non_food_categories:
-            if category_term in message_lower:
-                # Check for food-related exceptions to avoid false positives
-                food_exceptions = [
-                    'what is the recipe', 'how to cook', 'how to prepare', 'ingredients for',
-                    'cooking instructions', 'food preparation', 'kitchen tools', 'cooking techniques'
-                ]
-
-                if any(exception in message_lower for exception in food_exceptions):
-                    continue  # Allow if it's clearly food-related
-
-                return False, f"Non-food category term detected: '{category_term}'"
-
-        # Special handling for questions that are clearly outside domain
-        question_patterns = [
+        # Questions that are clearly outside the domain, regardless of keywords
+        self.question_patterns = [
             r'what is.*programming',
             r'what is.*programming language',
             r'what is.*framework',
@@ -196,9 +176,96 @@ class DomainGuardrails:
             r'what does.*stand for.*in.*technology',
         ]
 
-        for pattern in question_patterns:
-            if re.search(pattern, message_lower, re.IGNORECASE):
-                return False, f"Off-topic question pattern detected: '{pattern}'"
+        # Single-word keywords are matched as whole words via set intersection with the
+        # message tokens; multi-word phrases (and anything with characters outside a token)
+        # stay in one literal alternation per list so the message is scanned only once.
+        self._tech_words, self._tech_phrases = self._split_keywords(self.tech_keywords)
+        self._category_words, self._category_phrases = self._split_keywords(self.non_food_categories)
+        self._food_pattern = self._compile_keywords(self.food_related_indicators)
+        self._question_pattern = re.compile(
+            '|'.join(f'(?:{pattern})' for pattern in self.question_patterns), re.IGNORECASE
+        )
+
+        # The rule tables are immutable after init, so decisions depend only on the
+        # normalized message and can be cached for repeated short prompts
+        self._classify = functools.lru_cache(maxsize=4096)(self._classify_normalized)
+
+    @staticmethod
+    def _compile_keywords(keywords: Iterable[str]) -> Optional[re.Pattern]:
+        """Compile a list of literal keywords into one alternation pattern."""
+        keywords = list(keywords)
+        if not keywords:
+            return None
+        return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+
+    @classmethod
+    def _split_keywords(cls, keywords: Iterable[str]) -> Tuple[FrozenSet[str], Optional[re.Pattern]]:
+        """Split keywords into a whole-word set and a compiled pattern for the remaining phrases."""
+        words = set()
+        phrases = []
+        for keyword in keywords:
+            if _TOKEN_RE.fullmatch(keyword) and not keyword.endswith('.'):
+                words.add(keyword)
+            else:
+                phrases.append(keyword)
+        return frozenset(words), cls._compile_keywords(phrases)
+
+    @staticmethod
+    def _tokenize(message_lower: str) -> Set[str]:
+        """Tokenize a lowercased message into a set of words, ignoring trailing periods."""
+        return {token.rstrip('.') for token in _TOKEN_RE.findall(message_lower)}
+
+    @staticmethod
+    def _find_keyword(tokens: Set[str], message_lower: str, words: FrozenSet[str],
+                      phrases: Optional[re.Pattern]) -> Optional[str]:
+        """Return a keyword found in the message, checking whole words before phrases."""
+        hits = tokens & words
+        if hits:
+            return next(iter(hits))
+        if phrases is not None:
+            match = phrases.search(message_lower)
+            if match:
+                return match.group(0)
+        return None
+
+    def check_query_domain(self, message: str) -> Tuple[bool, str]:
+        """
+        Check if the query is within the food/cooking domain
+
+        Args:
+            message: The user query to check
+
+        Returns:
+            Tuple of (is_within_domain: bool, reason: str)
+        """
+        return self._classify(message.lower().strip())
+
+    def _classify_normalized(self, message_lower: str) -> Tuple[bool, str]:
+        """Classify a lowercased, stripped message; cached per instance via self._classify."""
+        tokens = self._tokenize(message_lower)
+
+        # Check for technical terms first, the most common reject path. They are allowed
+        # if the query is clearly food-related, which only needs checking on a hit.
+        tech_term = self._find_keyword(tokens, message_lower, self._tech_words, self._tech_phrases)
+        if tech_term and self._food_pattern.search(message_lower) is None:
+            return False, f"Technical term detected: '{tech_term}'"
+
+        # Check for non-food category terms
+        category_term = self._find_keyword(tokens, message_lower, self._category_words, self._category_phrases)
+        if category_term:
+            # Check for food-related exceptions to avoid false positives
+            food_exceptions = [
+                'what is the recipe', 'how to cook', 'how to prepare', 'ingredients for',
+                'cooking instructions', 'food preparation', 'kitchen tools', 'cooking techniques'
+            ]
+
+            if not any(exception in message_lower for exception in food_exceptions):
+                return False, f"Non-food category term detected: '{category_term}'"
+
+        # Special handling for questions that are clearly outside domain
+        question_match = self._question_pattern.search(message_lower)
+        if question_match:
+            return False, f"Off-topic question pattern detected: '{question_match.group(0)}'"
 
         # If we passed all checks, assume it's okay
         return True, "Query appears to be within domain"
@@ -213,19 +280,7 @@ class DomainGuardrails:
         Returns:
             A thematic response that redirects to food/cooking themes
         """
-        return (
-            "👨‍🍳 Hello! I'm your RecipeRAG culinary assistant, focused exclusively on cooking, recipes, and food! 🍳\n\n"
-            "I can't help with that particular question, but I'd love to help you create something delicious instead! 😊\n\n"
-            f"💡 You asked: \"{original_query}\"\n\n"
-            "🍽️ I specialize in helping with:\n"
-            "• Recipe suggestions based on your ingredients\n"
-            "• Cooking techniques and tips\n"
-            "• Meal planning and nutrition\n"
-            "• Ingredient substitutions\n"
-            "• Dietary restrictions and preferences\n\n"
-            "So, what ingredients do you have on hand? Or what kind of dish are you craving today? "
-            "I can suggest amazing recipes based on what you're looking for! 🍴✨"
-        )
+        return _THEMATIC_RESPONSE_TEMPLATE.format(query=original_query)
 
     def should_intercept_query(self, message: str) -> Tuple[bool, str]:
         """
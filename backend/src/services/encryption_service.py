@@ -1,17 +1,42 @@
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
+import functools
 import os
-from typing import Union
+import orjson
+from typing import Optional, Union
+
+
+@functools.lru_cache(maxsize=8)
+def _derive_key(password: bytes, salt: bytes) -> bytes:
+    """Derive a Fernet key from the password and salt using PBKDF2 (memoized per process)."""
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(password))
+
 
 class EncryptionService:
     def __init__(self, password: str = None):
         """
         Initialize the encryption service.
         If no password is provided, it will try to get it from environment variables.
+        If ENCRYPTION_KEY holds a pre-derived Fernet key, it is used directly and the
+        key derivation is skipped.
         """
         if password is None:
+            pre_derived_key = os.getenv("ENCRYPTION_KEY")
+            if pre_derived_key:
+                self.password = None
+                self.salt = None
+                self.key = pre_derived_key.encode()
+                self.cipher_suite = Fernet(self.key)
+                return
+
             password = os.getenv("ENCRYPTION_PASSWORD")
 
         if password is None:
@@ -24,14 +49,7 @@ class EncryptionService:
 
     def _generate_key(self) -> bytes:
         """Generate a key for encryption/decryption using PBKDF2 with the password and salt."""
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=self.salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(self.password))
-        return key
+        return _derive_key(self.password, self.salt)
 
     def encrypt_data(self, data: Union[str, bytes]) -> str:
         """
@@ -41,28 +59,32 @@ class EncryptionService:
             data: The data to encrypt (string or bytes)
 
         Returns:
-            The encrypted data as a base64-encoded string
+            The encrypted data as a Fernet token (URL-safe base64 string)
         """
         if isinstance(data, str):
             data = data.encode()
 
-        encrypted_data = self.cipher_suite.encrypt(data)
-        return base64.urlsafe_b64encode(encrypted_data).decode()
+        # Fernet tokens are already URL-safe base64, so no further encoding is needed
+        return self.cipher_suite.encrypt(data).decode('ascii')
 
     def decrypt_data(self, encrypted_data: Union[str, bytes]) -> str:
         """
         Decrypt the provided encrypted data.
 
         Args:
-            encrypted_data: The encrypted data to decrypt (base64-encoded string or bytes)
+            encrypted_data: The encrypted data to decrypt (Fernet token as string or bytes)
 
         Returns:
             The decrypted data as a string
         """
         if isinstance(encrypted_data, str):
-            encrypted_data = base64.urlsafe_b64decode(encrypted_data.encode())
+            encrypted_data = encrypted_data.encode('ascii')
 
-        decrypted_data = self.cipher_suite.decrypt(encrypted_data)
+        try:
+            decrypted_data = self.cipher_suite.decrypt(encrypted_data)
+        except InvalidToken:
+            # Values written before tokens were stored as-is carry an extra base64 layer
+            decrypted_data = self.cipher_suite.decrypt(base64.urlsafe_b64decode(encrypted_data))
         return decrypted_data.decode()
 
     def encrypt_health_data(self, health_data: dict) -> str:
@@ -73,25 +95,38 @@ class EncryptionService:
             health_data: Dictionary containing health-related information
 
         Returns:
-            The encrypted health data as a base64-encoded string
+            The encrypted health data as a Fernet token string
         """
-        import json
-        health_data_str = json.dumps(health_data)
-        return self.encrypt_data(health_data_str)
+        return self.encrypt_data(orjson.dumps(health_data))
 
     def decrypt_health_data(self, encrypted_health_data: str) -> dict:
         """
         Decrypt health-related user data.
 
         Args:
-            encrypted_health_data: The encrypted health data as a base64-encoded string
+            encrypted_health_data: The encrypted health data as a Fernet token string
 
         Returns:
             The decrypted health data as a dictionary
         """
-        import json
-        decrypted_str = self.decrypt_data(encrypted_health_data)
-        return json.loads(decrypted_str)
+        return orjson.loads(self.decrypt_data(encrypted_health_data))
+
+
+# Global instance, created on first use since the password comes from the environment
+_encryption_service: Optional[EncryptionService] = None
+
+
+def get_encryption_service() -> EncryptionService:
+    """
+    Get the encryption service instance.
+
+    Returns:
+        EncryptionService instance
+    """
+    global _encryption_service
+    if _encryption_service is None:
+        _encryption_service = EncryptionService()
+    return _encryption_service
 
 
 # Example usage:
@@ -1,17 +1,128 @@
+import asyncio
 import google.generativeai as genai
-from typing import Dict, Any, List, Optional
-from pydantic import BaseModel
-import json
+from typing import AsyncIterator, Dict, Any, List, Optional
+from pydantic import BaseModel, ValidationError
 import logging
+import os
+import re
+
+import orjson
+
+from src.utils.llm_cache import LLMResponseCache, make_cache_key
+from src.utils.semantic_cache import SemanticRecipeCache
 
 logger = logging.getLogger(__name__)
 
+# Exact-match cache of structured results, shared by all service instances
+_recipe_response_cache = LLMResponseCache(maxsize=1000, ttl=3600)
+
+# Raw model output for the same keys, replayed by the streaming path on a hit
+_recipe_text_cache = LLMResponseCache(maxsize=1000, ttl=3600)
+
+# Optional similarity-based cache for near-duplicate prompts, enabled by SEMANTIC_CACHE_THRESHOLD
+EMBEDDING_MODEL_NAME = os.getenv("GEMINI_EMBEDDING_MODEL_NAME", "models/text-embedding-004")
+_semantic_threshold = os.getenv("SEMANTIC_CACHE_THRESHOLD")
+_semantic_recipe_cache = (
+    SemanticRecipeCache(similarity_threshold=float(_semantic_threshold)) if _semantic_threshold else None
+)
+
 class RecipeGenerationRequest(BaseModel):
     ingredients: List[str]
     preferences: Dict[str, Any]
     user_profile: Optional[Dict[str, Any]] = None
     session_context: Optional[Dict[str, Any]] = None
 
+class NutritionalInfo(BaseModel):
+    calories: str = 'NA'
+    protein: str = 'NA'
+    carbs: str = 'NA'
+    fat: str = 'NA'
+    fiber: str = 'NA'
+
+class StructuredRecipe(BaseModel):
+    """Response schema requested from Gemini so recipes come back as JSON."""
+    title: str = 'Generated Recipe'
+    ingredients: List[str] = []
+    instructions: List[str] = []
+    prep_time: str = 'NA'
+    cook_time: str = 'NA'
+    servings: str = 'NA'
+    nutritional_info: NutritionalInfo = NutritionalInfo()
+    tips_variations: List[str] = []
+    customization_notes: List[str] = []
+
+# Ask Gemini for schema-constrained JSON instead of free text
+RECIPE_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": StructuredRecipe,
+}
+
+# Fixed parts of every recipe generation prompt
+RECIPE_SYSTEM_INSTRUCTION = "You are an expert chef and nutritionist."
+
+RECIPE_REQUIREMENTS = """Please provide:
+        1. Recipe title
+        2. Detailed ingredients list with quantities
+        3. Step-by-step cooking instructions
+        4. Estimated prep and cooking time
+        5. Serving size
+        6. Nutritional information (approximate)
+        7. Cooking tips and variations
+        8. Substitution suggestions if needed (as customization notes)
+
+        Make sure the recipe is practical, safe, and delicious. Consider the user's preferences and profile information when making suggestions."""
+
+# Profile fields rendered into the generation prompt: (key, line template, value is a list)
+_PROFILE_FIELDS = (
+    ('diet', "- Dietary preference: {}\n", False),
+    ('allergies', "- Allergies to avoid: {}\n", True),
+    ('health_conditions', "- Health conditions to consider: {}\n", True),
+    ('skill_level', "- Cooking skill level: {}. Adjust complexity accordingly.\n", False),
+    ('calorie_goal', "- Daily calorie goal: {}. Consider portion sizes.\n", False),
+    ('pregnancy', "- User is pregnant. Avoid any ingredients or preparations not safe for pregnancy.\n", False),
+    ('doctor_restrictions', "- Doctor's dietary restrictions: {}\n", False),
+)
+
+# Request fields that must match exactly before a semantic cache hit can be reused
+_SAFETY_FIELDS = (
+    'diet', 'dietary_restrictions', 'allergies', 'ingredient_exclusions',
+    'health_conditions', 'pregnancy', 'doctor_restrictions',
+)
+
+# Profile fields that matter when refining an existing recipe
+_REFINE_PROFILE_FIELDS = ('allergies', 'health_conditions', 'diet', 'pregnancy')
+
+
+def _render_profile_block(user_profile: Dict[str, Any], include: Optional[tuple] = None) -> str:
+    """
+    Render the set profile fields as prompt lines, optionally limited to the keys in `include`.
+    """
+    lines = []
+    for key, template, is_list in _PROFILE_FIELDS:
+        if include is not None and key not in include:
+            continue
+        value = user_profile.get(key)
+        if value:
+            lines.append(template.format(', '.join(value) if is_list else value))
+    return "".join(lines)
+
+# Keywords that mark a section or field in free-text recipe responses, mapped to what they set
+_SECTION_MARKERS = {
+    'title:': 'title',
+    'recipe:': 'title',
+    'ingredients': 'ingredients',
+    'instructions': 'instructions',
+    'steps': 'instructions',
+    'time:': 'prep_time',
+    'prep': 'prep_time',
+    'serving': 'servings',
+    'nutrition': 'nutrition',
+    'calories': 'nutrition',
+    'tip': 'tips',
+    'variation': 'tips',
+}
+_SECTION_RE = re.compile('|'.join(re.escape(keyword) for keyword in _SECTION_MARKERS))
+
 class GeminiIntegrationService:
     def __init__(self, api_key: str, model_name: str = None, text_model_name: str = None):
         genai.configure(api_key=api_key)
@@ -38,72 +149,83 @@ class GeminiIntegrationService:
             Formatted prompt string for the Gemini model
         """
         # Start with base ingredients
-        prompt = f"You are an expert chef and nutritionist. Create a detailed recipe using these ingredients: {', '.join(ingredients)}.\n\n"
+        parts = [f"{RECIPE_SYSTEM_INSTRUCTION} Create a detailed recipe using these ingredients: {', '.join(ingredients)}.\n\n"]
 
         # Add user preferences
         if preferences:
-            prompt += "Additional preferences to consider:\n"
+            parts.append("Additional preferences to consider:\n")
             for key, value in preferences.items():
                 if value:  # Only add non-empty preferences
                     if isinstance(value, list):
-                        prompt += f"- {key}: {', '.join(value)}\n"
+                        parts.append(f"- {key}: {', '.join(value)}\n")
                     else:
-                        prompt += f"- {key}: {value}\n"
-            prompt += "\n"
+                        parts.append(f"- {key}: {value}\n")
+            parts.append("\n")
 
         # Add user profile information if available
         if user_profile:
-            prompt += "User profile information to personalize the recipe:\n"
-
-            # Add dietary restrictions from profile
-            if user_profile.get('diet'):
-                prompt += f"- Dietary preference: {user_profile['diet']}\n"
-
-            # Add allergies from profile
-            allergies = user_profile.get('allergies', [])
-            if allergies:
-                prompt += f"- Allergies to avoid: {', '.join(allergies)}\n"
-
-            # Add health conditions from profile
-            health_conditions = user_profile.get('health_conditions', [])
-            if health_conditions:
-                prompt += f"- Health conditions to consider: {', '.join(health_conditions)}\n"
-
-            # Add cooking skill level
-            skill_level = user_profile.get('skill_level')
-            if skill_level:
-                prompt += f"- Cooking skill level: {skill_level}. Adjust complexity accordingly.\n"
-
-            # Add calorie goal
-            calorie_goal = user_profile.get('calorie_goal')
-            if calorie_goal:
-                prompt += f"- Daily calorie goal: {calorie_goal}. Consider portion sizes.\n"
-
-            # Add pregnancy status
-            if user_profile.get('pregnancy'):
-                prompt += "- User is pregnant. Avoid any ingredients or preparations not safe for pregnancy.\n"
+            parts.append("User profile information to personalize the recipe:\n")
 
-            # Add doctor restrictions
-            doctor_restrictions = user_profile.get('doctor_restrictions')
-            if doctor_restrictions:
-                prompt += f"- Doctor's dietary restrictions: {doctor_restrictions}\n"
+            parts.append(_render_profile_block(user_profile))
 
-            prompt += "\n"
+            parts.append("\n")
 
         # Add recipe requirements
-        prompt += """Please provide:
-        1. Recipe title
-        2. Detailed ingredients list with quantities
-        3. Step-by-step cooking instructions
-        4. Estimated prep and cooking time
-        5. Serving size
-        6. Nutritional information (approximate)
-        7. Cooking tips and variations
-        8. Substitution suggestions if needed
+        parts.append(RECIPE_REQUIREMENTS)
+
+        return "".join(parts)
+
+    def _generation_cache_key(self, ingredients: List[str], preferences: Dict[str, Any],
+                              user_profile: Optional[Dict[str, Any]]) -> str:
+        """Build the exact-match cache key for a recipe generation request."""
+        return make_cache_key({
+            'operation': 'generate',
+            'ingredients': sorted(ingredients),
+            'preferences': preferences,
+            'profile': user_profile,
+            'model': self.text_model.model_name
+        })
+
+    def _semantic_partition_key(self, preferences: Dict[str, Any],
+                                user_profile: Optional[Dict[str, Any]]) -> str:
+        """
+        Build the exact-match part of a semantic cache lookup: the rendered profile fields,
+        the safety-relevant preferences and the model, so a near-duplicate request is only
+        reused when allergies, diet, pregnancy and health restrictions are identical.
+        """
+        profile = user_profile or {}
+        return make_cache_key({
+            'profile': {key: profile.get(key) for key, _, _ in _PROFILE_FIELDS},
+            'profile_used': user_profile is not None,
+            'safety_preferences': {key: preferences.get(key) for key in _SAFETY_FIELDS if key in preferences},
+            'model': self.text_model.model_name
+        })
+
+    @staticmethod
+    def _semantic_cache_text(ingredients: List[str], preferences: Dict[str, Any]) -> str:
+        """
+        Render the part of a request that may be matched approximately: the ingredients and
+        the preferences that are not safety fields.
+        """
+        lines = [f"Ingredients: {', '.join(ingredients)}"]
+        for key, value in preferences.items():
+            if value and key not in _SAFETY_FIELDS:
+                lines.append(f"{key}: {', '.join(value) if isinstance(value, list) else value}")
+        return "\n".join(lines)
 
-        Make sure the recipe is practical, safe, and delicious. Consider the user's preferences and profile information when making suggestions."""
+    def _build_generated_recipe(self, recipe_text: str, user_profile: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Parse generated recipe text and add profile usage information."""
+        structured_recipe = self.parse_recipe_response(recipe_text)
 
-        return prompt
+        structured_recipe['profile_used'] = user_profile is not None
+        if user_profile:
+            structured_recipe['profile_summary'] = {
+                'diet': user_profile.get('diet'),
+                'allergies': user_profile.get('allergies', []),
+                'skill_level': user_profile.get('skill_level'),
+                'health_conditions': user_profile.get('health_conditions', [])
+            }
+        return structured_recipe
 
     async def generate_recipe_with_profile(self, ingredients: List[str], preferences: Dict[str, Any],
                                           user_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -119,46 +241,160 @@ class GeminiIntegrationService:
             Generated recipe as a dictionary
         """
         try:
+            # Identical requests return the cached result instead of calling Gemini again
+            cache_key = self._generation_cache_key(ingredients, preferences, user_profile)
+            cached_recipe = _recipe_response_cache.get(cache_key)
+            if cached_recipe is not None:
+                return cached_recipe
+
             # Generate the prompt with profile information
             prompt = self.generate_recipe_prompt(ingredients, preferences, user_profile)
 
+            # Near-duplicate requests (e.g. reordered ingredients) can reuse an earlier result;
+            # only ingredients and non-safety preferences are compared by similarity
+            prompt_embedding = None
+            if _semantic_recipe_cache is not None:
+                partition = self._semantic_partition_key(preferences, user_profile)
+                prompt_embedding = await asyncio.to_thread(
+                    self._embed_prompt, self._semantic_cache_text(ingredients, preferences)
+                )
+                cached_recipe = await asyncio.to_thread(
+                    _semantic_recipe_cache.lookup, prompt_embedding, partition
+                )
+                if cached_recipe is not None:
+                    _recipe_response_cache.set(cache_key, cached_recipe)
+                    return cached_recipe
+
             # Generate content using the text model
-            response = await self.text_model.generate_content_async(prompt)
+            response = await self.text_model.generate_content_async(
+                prompt, generation_config=RECIPE_GENERATION_CONFIG
+            )
+
+            # Parse and structure the response
+            structured_recipe = self._build_generated_recipe(response.text, user_profile)
+
+            _recipe_response_cache.set(cache_key, structured_recipe)
+            _recipe_text_cache.set(cache_key, response.text)
+            if prompt_embedding is not None:
+                # Adding may retrain the index, so keep it off the event loop
+                await asyncio.to_thread(_semantic_recipe_cache.add, prompt_embedding, structured_recipe, partition)
+            return structured_recipe
 
-            # Parse the response
-            recipe_text = response.text
+        except Exception as e:
+            logger.error(f"Error generating recipe with profile: {str(e)}")
+            raise
 
-            # Attempt to structure the response
-            structured_recipe = self.parse_recipe_response(recipe_text)
+    async def stream_recipe_with_profile(self, ingredients: List[str], preferences: Dict[str, Any],
+                                         user_profile: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Generate a recipe like generate_recipe_with_profile, yielding the response text as it
+        arrives so callers can forward it (e.g. via a StreamingResponse) before generation ends.
+        The full text is parsed and cached once the stream completes. A cached request replays
+        the stored model text, so callers receive the same raw recipe JSON on a hit or a miss.
 
-            # Add profile usage information
-            structured_recipe['profile_used'] = user_profile is not None
-            if user_profile:
-                structured_recipe['profile_summary'] = {
-                    'diet': user_profile.get('diet'),
-                    'allergies': user_profile.get('allergies', []),
-                    'skill_level': user_profile.get('skill_level'),
-                    'health_conditions': user_profile.get('health_conditions', [])
-                }
+        Args:
+            ingredients: List of ingredients provided by the user
+            preferences: User's dietary preferences and restrictions
+            user_profile: Optional user profile with health conditions, allergies, etc.
 
-            return structured_recipe
+        Yields:
+            Chunks of the model's recipe JSON text; cached text is yielded as a single chunk
+        """
+        try:
+            cache_key = self._generation_cache_key(ingredients, preferences, user_profile)
+            cached_text = _recipe_text_cache.get(cache_key)
+            if cached_text is not None:
+                yield cached_text
+                return
+
+            prompt = self.generate_recipe_prompt(ingredients, preferences, user_profile)
+
+            response = await self.text_model.generate_content_async(
+                prompt, generation_config=RECIPE_GENERATION_CONFIG, stream=True
+            )
+
+            chunks = []
+            async for chunk in response:
+                # Chunks without parts (e.g. a final safety or finish-reason chunk) have no text
+                if not chunk.parts:
+                    continue
+                chunks.append(chunk.text)
+                yield chunk.text
+
+            recipe_text = "".join(chunks)
+            structured_recipe = self._build_generated_recipe(recipe_text, user_profile)
+            _recipe_response_cache.set(cache_key, structured_recipe)
+            _recipe_text_cache.set(cache_key, recipe_text)
 
         except Exception as e:
-            logger.error(f"Error generating recipe with profile: {str(e)}")
+            logger.error(f"Error streaming recipe with profile: {str(e)}")
             raise
 
+    async def generate_recipes_batch(self, requests: List[RecipeGenerationRequest],
+                                     max_concurrency: int = 50) -> List[Dict[str, Any]]:
+        """
+        Generate recipes for several requests concurrently.
+
+        Calls are issued together with asyncio.gather instead of one after another,
+        bounded by a semaphore so a large batch stays within the API's rate limits.
+
+        Args:
+            requests: Recipe generation requests to process
+            max_concurrency: Maximum number of Gemini calls in flight at once
+
+        Returns:
+            Generated recipes, in the same order as the requests
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _bounded_generate(request: RecipeGenerationRequest) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.generate_recipe_with_profile(
+                    request.ingredients, request.preferences, request.user_profile
+                )
+
+        return await asyncio.gather(*(_bounded_generate(request) for request in requests))
+
+    def _embed_prompt(self, prompt: str) -> List[float]:
+        """
+        Embed request text for semantic cache lookups.
+
+        Args:
+            prompt: The similarity-matched part of the request (see _semantic_cache_text)
+
+        Returns:
+            Embedding vector for the text
+        """
+        result = genai.embed_content(model=EMBEDDING_MODEL_NAME, content=prompt, task_type="semantic_similarity")
+        return result['embedding']
+
     def parse_recipe_response(self, response_text: str) -> Dict[str, Any]:
         """
         Parse the Gemini response into a structured recipe format.
 
+        Args:
+            response_text: JSON text matching StructuredRecipe (free text is parsed as a fallback)
+
+        Returns:
+            Structured recipe dictionary
+        """
+        try:
+            return StructuredRecipe.model_validate_json(response_text).model_dump()
+        except ValidationError:
+            logger.warning("Gemini response did not match the recipe schema, falling back to text parsing")
+            return self._parse_recipe_text(response_text)
+
+    def _parse_recipe_text(self, response_text: str) -> Dict[str, Any]:
+        """
+        Parse a free-text Gemini response into a structured recipe format.
+
         Args:
             response_text: Raw text response from Gemini
 
         Returns:
             Structured recipe dictionary
         """
-        # This is a simplified parser - in a real implementation,
-        # you might use more sophisticated NLP or structured output from Gemini
+        # This is a simplified parser, used only when structured output is unavailable
         recipe = {
             'title': 'Generated Recipe',
             'ingredients': [],
@@ -173,32 +409,30 @@ class GeminiIntegrationService:
 
         # Basic parsing - in practice, you'd want more robust parsing
         lines = response_text.split('\n')
-        current_section = None
+        # Bulleted lines are appended to the list of the current section, if it collects items
+        section_items = {
+            'ingredients': recipe['ingredients'],
+            'instructions': recipe['instructions'],
+            'tips': recipe['tips_variations'],
+        }
+        current_items = None
 
         for line in lines:
-            line_lower = line.lower().strip()
+            match = _SECTION_RE.search(line.lower())
+            marker = _SECTION_MARKERS[match.group()] if match else None
 
-            if 'title:' in line_lower or 'recipe:' in line_lower:
+            if marker == 'title':
                 recipe['title'] = line.replace('Title:', '').replace('Recipe:', '').strip()
-            elif 'ingredients' in line_lower:
-                current_section = 'ingredients'
-            elif 'instructions' in line_lower or 'steps' in line_lower:
-                current_section = 'instructions'
-            elif 'time:' in line_lower or 'prep' in line_lower:
+            elif marker == 'prep_time':
                 recipe['prep_time'] = line.strip()
-            elif 'serving' in line_lower:
+            elif marker == 'servings':
                 recipe['servings'] = line.strip()
-            elif 'nutrition' in line_lower or 'calories' in line_lower:
-                current_section = 'nutrition'
-            elif 'tip' in line_lower or 'variation' in line_lower:
-                current_section = 'tips'
-            elif line.strip().startswith(('- ', '*', '•')):
-                if current_section == 'ingredients':
-                    recipe['ingredients'].append(line.strip('- *• '))
-                elif current_section == 'instructions':
-                    recipe['instructions'].append(line.strip('- *• '))
-                elif current_section == 'tips':
-                    recipe['tips_variations'].append(line.strip('- *• '))
+            elif marker is not None:
+                current_items = section_items.get(marker)
+            elif current_items is not None:
+                stripped = line.strip()
+                if stripped.startswith(('- ', '*', '•')):
+                    current_items.append(stripped.strip('- *•'))
 
         return recipe
 
@@ -217,26 +451,33 @@ class GeminiIntegrationService:
             Refined recipe as a dictionary
         """
         try:
+            cache_key = make_cache_key({
+                'operation': 'refine',
+                'recipe': current_recipe,
+                'refinement_request': refinement_request,
+                'profile': user_profile,
+                'model': self.text_model.model_name
+            })
+            cached_recipe = _recipe_response_cache.get(cache_key)
+            if cached_recipe is not None:
+                return cached_recipe
+
             # Create a prompt that includes the current recipe and refinement request
             prompt = f"Here is the current recipe:\n\n"
-            prompt += json.dumps(current_recipe, indent=2)
+            # Compact JSON: indentation only costs tokens
+            prompt += orjson.dumps(current_recipe, default=str).decode()
             prompt += f"\n\nThe user wants to refine this recipe with the following request: '{refinement_request}'\n\n"
 
             if user_profile:
                 prompt += "Consider the user's profile information when making changes:\n"
-                if user_profile.get('allergies'):
-                    prompt += f"- Allergies to avoid: {', '.join(user_profile['allergies'])}\n"
-                if user_profile.get('health_conditions'):
-                    prompt += f"- Health conditions to consider: {', '.join(user_profile['health_conditions'])}\n"
-                if user_profile.get('diet'):
-                    prompt += f"- Dietary preference: {user_profile['diet']}\n"
-                if user_profile.get('pregnancy'):
-                    prompt += "- User is pregnant. Ensure all ingredients are safe for pregnancy.\n"
+                prompt += _render_profile_block(user_profile, _REFINE_PROFILE_FIELDS)
 
-            prompt += "\nPlease provide the refined recipe, clearly indicating what changes were made based on the user's request."
+            prompt += "\nPlease provide the refined recipe, listing the changes made based on the user's request as customization notes."
 
             # Generate refined recipe
-            response = await self.text_model.generate_content_async(prompt)
+            response = await self.text_model.generate_content_async(
+                prompt, generation_config=RECIPE_GENERATION_CONFIG
+            )
 
             # Parse the response
             refined_recipe = self.parse_recipe_response(response.text)
@@ -246,6 +487,7 @@ class GeminiIntegrationService:
             refined_recipe['refinement_request'] = refinement_request
             refined_recipe['profile_considered'] = user_profile is not None
 
+            _recipe_response_cache.set(cache_key, refined_recipe)
             return refined_recipe
 
         except Exception as e:
@@ -1,13 +1,61 @@
 import google.generativeai as genai
 from google.generativeai.types import content_types
 from typing import List, Dict, Any, Union
+import asyncio
+import datetime
+import functools
+import logging
 import os
+import random
+import time
+
+import orjson
 from dotenv import load_dotenv
 from src.utils.response_parser import ResponseParser
 
 # Load environment variables
 load_dotenv()
 
+@functools.lru_cache(maxsize=1)
+def _get_model():
+    """
+    Create the chat model shared by all GeminiService instances, falling back
+    to older models if the configured one is unavailable.
+    """
+    # Use the appropriate model (from existing .env)
+    model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash")
+
+    # Attempt to initialize the model, fall back to a default if unavailable
+    try:
+        return genai.GenerativeModel(model_name)
+    except Exception as e:
+        # If the specified model is not available, try a fallback model
+        print(f"Warning: Model {model_name} not available: {e}")
+        print("Trying fallback model gemini-1.5-pro...")
+        try:
+            return genai.GenerativeModel("gemini-1.5-pro")
+        except Exception:
+            # If gemini-1.5-pro is also not available, try gemini-pro
+            print("Warning: gemini-1.5-pro not available, trying gemini-pro...")
+            return genai.GenerativeModel("gemini-pro")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_summary_model():
+    """
+    Create the low-cost model used to summarize old chat history during compaction.
+    """
+    return genai.GenerativeModel(os.getenv("GEMINI_SUMMARY_MODEL_NAME", "gemini-1.5-flash"))
+
+
+@functools.lru_cache(maxsize=1)
+def _get_response_parser() -> ResponseParser:
+    """
+    Get the response parser shared by all GeminiService instances.
+    """
+    return ResponseParser()
+
+
 class GeminiService:
     """
     Service class for handling Gemini chat interactions.
@@ -22,25 +70,9 @@ class GeminiService:
 
         genai.configure(api_key=api_key)
 
-        # Use the appropriate model (from existing .env)
-        model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash")
-
-        # Attempt to initialize the model, fall back to a default if unavailable
-        try:
-            self.model = genai.GenerativeModel(model_name)
-        except Exception as e:
-            # If the specified model is not available, try a fallback model
-            print(f"Warning: Model {model_name} not available: {e}")
-            print("Trying fallback model gemini-1.5-pro...")
-            try:
-                self.model = genai.GenerativeModel("gemini-1.5-pro")
-            except Exception:
-                # If gemini-1.5-pro is also not available, try gemini-pro
-                print("Warning: gemini-1.5-pro not available, trying gemini-pro...")
-                self.model = genai.GenerativeModel("gemini-pro")
-
-        # Initialize response parser
-        self.response_parser = ResponseParser()
+        # The model and parser are stateless, so all instances share one of each
+        self.model = _get_model()
+        self.response_parser = _get_response_parser()
 
         # Configure safety settings as per requirements
         self.safety_settings = [
@@ -101,8 +133,9 @@ class GeminiService:
             if include_preferences:
                 preferences = session_data.get('preferences', {})
 
-                # Format preferences as a string to include in the message context
-                preferences_context = self._format_preferences_for_context(preferences)
+                # Format preferences as a string to include in the message context,
+                # reusing the formatted string while the preferences are unchanged
+                preferences_context = self._get_preferences_context(session_data, preferences)
 
                 if preferences_context.strip():
                     context_parts.append(f"User preferences and constraints: {preferences_context}")
@@ -123,11 +156,9 @@ class GeminiService:
         response_text = response.text
 
         # Process the response to ensure it contains required reasoning sections
-        processed_response = await self.response_parser.parse_and_enforce_structure(response_text)
+        processed_response = self.response_parser.parse_and_enforce_structure(response_text)
 
         # Update the session history with the new interaction
-        import datetime
-
         # Add the user message to history
         user_message = {
             'role': 'user',
@@ -149,27 +180,37 @@ class GeminiService:
         session_data['history'].append(user_message)
         session_data['history'].append(ai_message)
 
-        # Update the session history in the chat session as well
-        try:
-            # Add messages to the chat session history
-            chat_session.history.extend([user_message, ai_message])
-        except:
-            # If we can't update the chat session history directly,
-            # the important thing is that session_data is updated
-            pass
+        # Keep a running token estimate so the limit check doesn't rescan the whole history
+        if 'estimated_tokens' in session_data:
+            session_data['estimated_tokens'] += (
+                self._estimate_message_tokens(user_message) + self._estimate_message_tokens(ai_message)
+            )
+
+        # The chat session records this turn in its own history when the message is sent,
+        # so session_data['history'] only holds the timestamped copy used for persistence
 
         # Update token limits
         await self._check_token_limits(session_data)
 
         # Add performance logging for this conversation turn
-        import time
-        import logging
         end_time = time.time()
         # We don't have the start time here, but the chat_router handles that
         logging.info(f"Gemini service processing completed for session")
 
         return processed_response
 
+    def _get_preferences_context(self, session_data: Dict[str, Any], preferences: Dict[str, Any]) -> str:
+        """
+        Return the formatted preferences context, memoized on the session data.
+        The cache is keyed by a canonical serialization of the preferences, so it is
+        rebuilt only when they change.
+        """
+        preferences_key = orjson.dumps(preferences, default=str, option=orjson.OPT_SORT_KEYS)
+        if session_data.get('_preferences_key') != preferences_key:
+            session_data['_preferences_context'] = self._format_preferences_for_context(preferences)
+            session_data['_preferences_key'] = preferences_key
+        return session_data['_preferences_context']
+
     def _format_preferences_for_context(self, preferences: Dict[str, Any]) -> str:
         """
         Format the user preferences into a string that can be included in the message context.
@@ -218,27 +259,85 @@ class GeminiService:
         Check if the conversation is approaching token limits.
         The 1M token window is shared across conversation history.
         """
-        # Estimate token count (rough approximation: 1 token ≈ 4 characters)
-        history = session_data.get('history', [])
+        # Estimate token count (rough approximation: 1 token ≈ 4 characters).
+        # The full history is only scanned once per session (e.g. after loading it from the
+        # database); send_message keeps the counter up to date afterwards.
+        if 'estimated_tokens' not in session_data:
+            session_data['estimated_tokens'] = sum(
+                self._estimate_message_tokens(message) for message in session_data.get('history', [])
+            )
 
-        estimated_tokens = 0
-        for message in history:
-            parts = message.get('parts', [])
-            for part in parts:
-                if isinstance(part, str):
-                    estimated_tokens += len(part) // 4
-                elif isinstance(part, dict) and 'data' in part:
-                    # For image data, just count the mime type description
-                    mime_type = part.get('mime_type', '')
-                    estimated_tokens += len(mime_type) // 4
-
-        # If we're approaching 80% of the 1M token limit, log a warning
+        estimated_tokens = session_data['estimated_tokens']
+
+        # If we're approaching 80% of the 1M token limit, compact the model's context
         if estimated_tokens > 1_000_000 * threshold:
-            import logging
             logging.warning(f"Conversation approaching token limit: {estimated_tokens}/{1_000_000} tokens used")
+            await self._compact_chat_history(session_data)
 
-            # In a real implementation, we might want to summarize or compress the history
-            # For now, we just log the warning
+    async def _compact_chat_history(self, session_data: Dict[str, Any]):
+        """
+        Replace the oldest half of the chat session's history with a short summary.
+
+        Only the model-facing history held by the chat session is compacted;
+        session_data['history'] keeps the full transcript that is saved to the database.
+        The reply for the current turn has already been recorded, so if the summary
+        cannot be generated the existing chat session is kept and the turn still succeeds.
+        """
+        chat_session = session_data.get('chat_session')
+        if chat_session is None:
+            return
+
+        history = list(chat_session.history)
+        # Cut on a user/model turn boundary so roles keep alternating
+        cutoff = len(history) // 2
+        cutoff -= cutoff % 2
+        if cutoff == 0:
+            return
+
+        old_text = "\n".join(
+            f"{content.role}: {part.text}"
+            for content in history[:cutoff]
+            for part in content.parts
+            if part.text
+        )
+        try:
+            summary = await _get_summary_model().generate_content_async(
+                "Summarize this conversation briefly, keeping every preference, allergy and "
+                "constraint the user stated:\n\n" + old_text
+            )
+            # .text raises ValueError when the summary was blocked or came back empty
+            summary_text = summary.text
+        except Exception as e:
+            logging.error(f"Chat history compaction failed, keeping the full context: {e}")
+            return
+
+        summary_part = f"[Prior conversation summary]: {summary_text}"
+        compacted_history = [
+            {'role': 'user', 'parts': [summary_part]},
+            {'role': 'model', 'parts': ["Understood, I'll keep that context in mind."]},
+        ] + history[cutoff:]
+        session_data['chat_session'] = self.model.start_chat(history=compacted_history)
+
+        session_data['estimated_tokens'] = len(summary_part) // 4 + sum(
+            len(part.text) // 4 for content in history[cutoff:] for part in content.parts
+        )
+        logging.info(f"Compacted {cutoff} chat messages into a summary; "
+                     f"estimated context is now {session_data['estimated_tokens']} tokens")
+
+    @staticmethod
+    def _estimate_message_tokens(message: Dict[str, Any]) -> int:
+        """
+        Estimate the token count of a single history message.
+        """
+        estimated_tokens = 0
+        for part in message.get('parts', []):
+            if isinstance(part, str):
+                estimated_tokens += len(part) // 4
+            elif isinstance(part, dict) and 'data' in part:
+                # For image data, just count the mime type description
+                mime_type = part.get('mime_type', '')
+                estimated_tokens += len(mime_type) // 4
+        return estimated_tokens
 
     async def _send_with_retry(self, chat_session, content_parts: List[Any], max_retries: int = 3):
         """
@@ -265,7 +364,7 @@ class GeminiService:
                         # Add as text if it's any other type
                         formatted_parts.append(str(part))
 
-                response = chat_session.send_message(
+                response = await chat_session.send_message_async(
                     formatted_parts,
                     safety_settings=self.safety_settings
                 )
@@ -273,11 +372,9 @@ class GeminiService:
                 # Check if the response was blocked by safety settings
                 if hasattr(response, '_raw_response') and hasattr(response._raw_response, 'prompt_feedback'):
                     if hasattr(response._raw_response.prompt_feedback, 'block_reason') and response._raw_response.prompt_feedback.block_reason:
-                        import logging
                         logging.warning(f"Response blocked by safety filters: {response._raw_response.prompt_feedback.block_reason}")
 
                         # Return a helpful message to the user
-                        from google.generativeai.types import generation_types
                         # Create a mock response object with a helpful message
                         class BlockedResponse:
                             def __init__(self):
@@ -289,15 +386,17 @@ class GeminiService:
             except Exception as e:
                 if attempt == max_retries - 1:  # Last attempt
                     raise e
-                # Wait a bit before retrying
-                import time
-                time.sleep(0.5)
+                # Back off exponentially with jitter, without blocking the event loop
+                await asyncio.sleep(0.5 * (2 ** attempt) + random.uniform(0, 0.25))
 
         raise Exception(f"Failed to get response after {max_retries} attempts")
 
-    def _get_system_prompt(self) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _get_system_prompt() -> str:
         """
         Get the system prompt from the file or default to hardcoded value.
+        The prompt file is static, so it is read from disk once per process.
         """
         try:
             with open("backend/prompts/agent-system-v1.txt", "r") as f:
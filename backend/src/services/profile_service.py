@@ -1,53 +1,75 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
+from database.session import commit_without_expiring
 from ..models.user_profile import UserProfile
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-def get_user_profile(db: Session, user_id: str) -> UserProfile:
-    return db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+# Profile preference fields in stored order, with how each is normalized:
+# list -> the value if it is a list, else []; int -> int(value), 0 if unset;
+# anything else -> the value as given, or that default when the key is missing
+_PREFERENCE_FIELDS = (
+    ("diet", ""),
+    ("allergies", list),
+    ("skill_level", ""),
+    ("likes", list),
+    ("dislikes", list),
+    ("cuisine_preferences", list),
+    ("cooking_time_preference", ""),
+    ("health_focus", list),
+    ("daily_calorie_target", int),
+    # Keep old fields for backward compatibility
+    ("age", None),
+    ("gender", None),
+    ("pregnancy", False),
+    ("doctor_restrictions", ""),
+    ("calorie_goal", int),  # Legacy field
+    ("likes_dislikes", list),  # Legacy field
+)
+
+def _migrate_preferences(preferences: Dict[Any, Any]) -> Dict[str, Any]:
+    """Normalize submitted preferences to the current profile structure, reading each field once."""
+    migrated = {}
+    for key, kind in _PREFERENCE_FIELDS:
+        if kind is list:
+            value = preferences.get(key)
+            migrated[key] = value if isinstance(value, list) else []
+        elif kind is int:
+            value = preferences.get(key)
+            migrated[key] = int(value) if value is not None else 0
+        else:
+            migrated[key] = preferences.get(key, kind)
+    return migrated
+
+def get_user_profile(db: Session, user_id: str) -> Optional[UserProfile]:
+    # user_id is unique and indexed, so this is a single index lookup
+    stmt = select(UserProfile).where(UserProfile.user_id == user_id).limit(1)
+    return db.execute(stmt).scalar_one_or_none()
+
+def get_user_preferences(db: Session, user_id: str) -> Optional[Dict[str, Any]]:
+    """Load only a user's stored preferences, without materializing the profile object."""
+    stmt = select(UserProfile.preferences).where(UserProfile.user_id == user_id).limit(1)
+    return db.execute(stmt).scalar_one_or_none()
 
 def create_or_update_profile(db: Session, user_id: str, preferences: Dict[Any, Any]) -> UserProfile:
     # Handle migration from old structure to new structure
-    migrated_preferences = {
-        "diet": preferences.get("diet", ""),
-        "allergies": preferences.get("allergies", []) if isinstance(preferences.get("allergies"), list) else [],
-        "skill_level": preferences.get("skill_level", ""),
-        "likes": preferences.get("likes", []) if isinstance(preferences.get("likes"), list) else [],
-        "dislikes": preferences.get("dislikes", []) if isinstance(preferences.get("dislikes"), list) else [],
-        "cuisine_preferences": preferences.get("cuisine_preferences", []) if isinstance(preferences.get("cuisine_preferences"), list) else [],
-        "cooking_time_preference": preferences.get("cooking_time_preference", ""),
-        "health_focus": preferences.get("health_focus", []) if isinstance(preferences.get("health_focus"), list) else [],
-        "daily_calorie_target": int(preferences.get("daily_calorie_target", 0)) if preferences.get("daily_calorie_target") is not None else 0,
-        # Keep old fields for backward compatibility
-        "age": preferences.get("age"),
-        "gender": preferences.get("gender"),
-        "pregnancy": preferences.get("pregnancy", False),
-        "doctor_restrictions": preferences.get("doctor_restrictions", ""),
-        "calorie_goal": int(preferences.get("calorie_goal", 0)) if preferences.get("calorie_goal") is not None else 0,  # Legacy field
-        "likes_dislikes": preferences.get("likes_dislikes", []) if isinstance(preferences.get("likes_dislikes"), list) else []  # Legacy field
-    }
+    migrated_preferences = _migrate_preferences(preferences)
 
-    profile = get_user_profile(db, user_id)
-    if profile:
-        # Merge existing preferences with new ones to preserve any missing fields
-        existing_prefs = profile.preferences or {}
-        # Ensure all expected fields are present in existing preferences
-        for key, default_value in migrated_preferences.items():
-            if key not in existing_prefs:
-                existing_prefs[key] = default_value
-        
-        # Update with new values
-        for key, value in migrated_preferences.items():
-            existing_prefs[key] = value
-            
-        profile.preferences = existing_prefs
-        profile.updated_at = func.now()
-    else:
-        profile = UserProfile(user_id=user_id, preferences=migrated_preferences)
-        db.add(profile)
-
-    db.commit()
-    db.refresh(profile)
+    # Single-statement upsert: insert the profile, or merge the new preferences into the
+    # stored ones server-side (JSONB ||), so concurrent saves can't race between read and write
+    stmt = insert(UserProfile).values(user_id=user_id, preferences=migrated_preferences)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserProfile.user_id],
+        set_={
+            "preferences": UserProfile.preferences.op("||")(stmt.excluded.preferences),
+            "updated_at": func.now(),
+        },
+    ).returning(UserProfile)
+
+    # The returned row is current, so don't expire it (and re-select it) on commit
+    profile = db.scalars(stmt, execution_options={"populate_existing": True}).one()
+    commit_without_expiring(db)
     return profile
 
 def delete_profile(db: Session, user_id: str) -> bool:
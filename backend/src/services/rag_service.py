@@ -1,9 +1,13 @@
+import asyncio
 import os
-import psycopg2
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from typing import List, Dict, Any
 from dotenv import load_dotenv
 import logging
 
+from services.embedding_service import get_embedding_service
+
 # Load environment variables
 load_dotenv()
 
@@ -19,15 +23,19 @@ class RagService:
         if not self.db_url:
             raise ValueError("NEON_DB_URL environment variable is not set")
 
-        self.connection = None
+        self._pool = None
         self._connect_to_db()
 
     def _connect_to_db(self):
         """
-        Establish connection to the Neon PostgreSQL database.
+        Create the connection pool for the Neon PostgreSQL database.
+        Each query borrows a connection, so concurrent requests don't serialize on one socket.
+        Keep RAG_DB_POOL_MAX plus the SQLAlchemy engine's pool_size + max_overflow
+        below the server's max_connections.
         """
         try:
-            self.connection = psycopg2.connect(self.db_url)
+            max_connections = int(os.getenv("RAG_DB_POOL_MAX", "10"))
+            self._pool = ThreadedConnectionPool(1, max_connections, self.db_url)
             logging.info("Successfully connected to Neon database")
         except Exception as e:
             logging.error(f"Failed to connect to database: {e}")
@@ -38,27 +46,99 @@ class RagService:
         Retrieve top N relevant recipes based on provided ingredients.
         This provides grounding for the Gemini model's responses.
         """
-        if not self.connection:
+        if not self._pool:
             raise Exception("Database connection not established")
 
         try:
-            cursor = self.connection.cursor()
-
-            # This is a simplified query - in a real implementation,
-            # you would use vector similarity search with pgvector
-            # For now, we'll simulate by returning mock data
-            recipes = self._mock_get_recipes_by_ingredients(ingredients, n)
-
-            return recipes
+            # psycopg2 is blocking, so the query runs on a worker thread to keep the
+            # event loop free for other requests while waiting on the database
+            return await asyncio.to_thread(self._query_top_n_recipes, ingredients, n)
         except Exception as e:
             logging.error(f"Error retrieving recipes: {e}")
             # Return mock data in case of error
             return self._mock_get_recipes_by_ingredients(ingredients, n)
 
+    def _query_top_n_recipes(self, ingredients: List[str], n: int) -> List[Dict[str, Any]]:
+        """
+        Run the recipe retrieval query on a pooled connection.
+        """
+        # Sample data can still be used for local development without a populated recipes table
+        if os.getenv("RAG_MOCK") == "1":
+            return self._mock_get_recipes_by_ingredients(ingredients, n)
+
+        connection = self._pool.getconn()
+        try:
+            cursor = connection.cursor(cursor_factory=RealDictCursor)
+
+            if len(ingredients) > 1:
+                # One embedding per ingredient, matched in a single round-trip
+                rows = self._fetch_nearest_for_each(
+                    cursor, get_embedding_service().embed_texts(ingredients), n
+                )
+            else:
+                query_embedding = get_embedding_service().embed_ingredients(ingredients)
+
+                # Nearest neighbours by cosine distance, served by the recipes table's HNSW index
+                cursor.execute(
+                    """
+                    SELECT id, title, ingredients, instructions
+                    FROM recipes
+                    ORDER BY embedding <=> %s::VECTOR
+                    LIMIT %s;
+                    """,
+                    (query_embedding, n)
+                )
+                rows = cursor.fetchall()
+        finally:
+            self._pool.putconn(connection)
+
+        return [
+            {
+                "id": row["id"],
+                "name": row["title"],
+                "ingredients": row["ingredients"].split(', ') if row["ingredients"] else [],
+                "instructions": row["instructions"] or "",
+            }
+            for row in rows
+        ]
+
+    def _fetch_nearest_for_each(self, cursor, query_embeddings: List[List[float]], n: int) -> List[Dict[str, Any]]:
+        """
+        Find the n recipes closest to any of the query embeddings with one query.
+
+        Each embedding gets its own HNSW-backed top-n scan through a LATERAL join over a VALUES
+        list; recipes found by several embeddings are kept once, at their best distance.
+        """
+        limit = int(n)
+        return execute_values(
+            cursor,
+            f"""
+            SELECT id, title, ingredients, instructions
+            FROM (
+                SELECT DISTINCT ON (nearest.id) nearest.*
+                FROM (VALUES %s) AS query (embedding)
+                CROSS JOIN LATERAL (
+                    SELECT id, title, ingredients, instructions,
+                           recipes.embedding <=> query.embedding AS distance
+                    FROM recipes
+                    ORDER BY recipes.embedding <=> query.embedding
+                    LIMIT {limit}
+                ) AS nearest
+                ORDER BY nearest.id, nearest.distance
+            ) AS best
+            ORDER BY distance
+            LIMIT {limit};
+            """,
+            [(embedding,) for embedding in query_embeddings],
+            template="(%s::VECTOR)",
+            page_size=len(query_embeddings),
+            fetch=True
+        )
+
     def _mock_get_recipes_by_ingredients(self, ingredients: List[str], n: int) -> List[Dict[str, Any]]:
         """
         Mock implementation to return sample recipes based on ingredients.
-        In a real implementation, this would query the vector database.
+        Used when RAG_MOCK=1 and as a fallback when the vector query fails.
         """
         # For now, return some sample recipes
         sample_recipes = [
@@ -99,8 +179,8 @@ class RagService:
 
     async def close_connection(self):
         """
-        Close the database connection.
+        Close all pooled database connections.
         """
-        if self.connection:
-            self.connection.close()
+        if self._pool:
+            self._pool.closeall()
             logging.info("Database connection closed")
\ No newline at end of file
@@ -1,9 +1,25 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Set
+import functools
 import logging
 from ..models.recipe_card import RecipeCard  # Assuming this is the recipe model
 
 logger = logging.getLogger(__name__)
 
+# Joins lowercased context documents into one searchable string
+_CONTEXT_SEPARATOR = '\x00'
+
+# Cooking actions that indicate an instruction is grounded in the context
+_COOKING_VERBS = ('cook', 'boil', 'fry', 'bake', 'stir', 'mix', 'add')
+
+
+def _cooking_verb_mask(text: str) -> int:
+    """Return a bitmask with bit i set when _COOKING_VERBS[i] occurs in the lowercased text."""
+    mask = 0
+    for bit, verb in enumerate(_COOKING_VERBS):
+        if verb in text:
+            mask |= 1 << bit
+    return mask
+
 class RAGValidationService:
     """
     Service for validating generated recipes against RAG data to prevent hallucinations
@@ -33,16 +49,16 @@ class RAGValidationService:
             'hallucinations_detected': []
         }
 
+        # Lowercase and join the context once instead of once per checked value
+        corpus = self._build_search_corpus(rag_context)
+
         # Validate ingredients
         if 'ingredients' in recipe_data:
-            for ingredient in recipe_data['ingredients']:
-                if isinstance(ingredient, dict):
-                    ingredient_name = ingredient.get('name', '').lower()
-                else:
-                    ingredient_name = str(ingredient).lower()
+            ingredient_names = [self._ingredient_name(ingredient) for ingredient in recipe_data['ingredients']]
+            unsupported = self._unsupported_ingredients(ingredient_names, corpus)
 
-                # Check if ingredient appears in RAG context
-                if not self._ingredient_in_rag_context(ingredient_name, rag_context):
+            for ingredient_name in ingredient_names:
+                if ingredient_name in unsupported:
                     validation_results['hallucinations_detected'].append({
                         'type': 'ingredient',
                         'value': ingredient_name,
@@ -54,7 +70,7 @@ class RAGValidationService:
         if 'instructions' in recipe_data:
             for instruction in recipe_data['instructions']:
                 # Look for cooking methods that might be hallucinated
-                if not self._instruction_in_rag_context(str(instruction), rag_context):
+                if not self._instruction_in_rag_context(str(instruction), corpus):
                     validation_results['warnings'].append({
                         'type': 'instruction',
                         'value': str(instruction)[:50] + '...',
@@ -64,7 +80,7 @@ class RAGValidationService:
         # Validate nutritional claims
         if 'nutrition_info' in recipe_data:
             for nutrient, value in recipe_data['nutrition_info'].items():
-                if not self._nutrition_in_rag_context(nutrient, rag_context):
+                if not self._nutrition_in_rag_context(nutrient, corpus):
                     validation_results['warnings'].append({
                         'type': 'nutrition',
                         'value': f'{nutrient}: {value}',
@@ -73,7 +89,7 @@ class RAGValidationService:
 
         # Validate recipe title
         if 'title' in recipe_data:
-            if not self._title_in_rag_context(recipe_data['title'], rag_context):
+            if not self._title_in_rag_context(recipe_data['title'], corpus):
                 validation_results['warnings'].append({
                     'type': 'title',
                     'value': recipe_data['title'],
@@ -82,90 +98,116 @@ class RAGValidationService:
 
         return validation_results
 
-    def _ingredient_in_rag_context(self, ingredient: str, rag_context: List[Dict[str, Any]]) -> bool:
+    def _build_search_corpus(self, rag_context: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Lowercase the RAG context once into structures that can be searched in a single pass.
+
+        Args:
+            rag_context: The RAG context
+
+        Returns:
+            Dict with the joined context content (None if no item has content), a bitmask of
+            the cooking verbs it mentions, the ingredient names of items without content, and the
+            context titles
+        """
+        contents = [item['content'].lower() for item in rag_context if 'content' in item]
+        # The separator keeps a match from spanning two context items
+        content = _CONTEXT_SEPARATOR.join(contents) if contents else None
+        return {
+            'content': content,
+            'cooking_verb_mask': _cooking_verb_mask(content) if content is not None else 0,
+            'ingredients': {
+                ingredient.lower()
+                for item in rag_context if 'content' not in item
+                for ingredient in item.get('ingredients', [])
+            },
+            'titles': [item['title'].lower() for item in rag_context if 'title' in item],
+        }
+
+    @staticmethod
+    def _ingredient_name(ingredient: Any) -> str:
+        """
+        Get the lowercased name of a recipe ingredient given as a dict or a plain value.
+        """
+        if isinstance(ingredient, dict):
+            return ingredient.get('name', '').lower()
+        return str(ingredient).lower()
+
+    def _unsupported_ingredients(self, ingredient_names: List[str], corpus: Dict[str, Any]) -> Set[str]:
+        """
+        Find the ingredient names that are not supported by the RAG context.
+        Each distinct name is searched for only once, however often it appears.
+
+        Args:
+            ingredient_names: Lowercased ingredient names from the recipe
+            corpus: The search corpus built from the RAG context
+
+        Returns:
+            Set of unsupported ingredient names
+        """
+        return {
+            name for name in set(ingredient_names)
+            if not self._ingredient_in_rag_context(name, corpus)
+        }
+
+    def _ingredient_in_rag_context(self, ingredient: str, corpus: Dict[str, Any]) -> bool:
         """
         Check if an ingredient appears in the RAG context.
 
         Args:
             ingredient: The ingredient to check
-            rag_context: The RAG context
+            corpus: The search corpus built from the RAG context
 
         Returns:
             True if ingredient is found in context, False otherwise
         """
-        for context_item in rag_context:
-            if 'content' in context_item:
-                content = context_item['content'].lower()
-                if ingredient in content:
-                    return True
-            elif 'ingredients' in context_item:
-                context_ingredients = [i.lower() for i in context_item['ingredients']]
-                if ingredient in context_ingredients:
-                    return True
-        return False
+        content = corpus['content']
+        return (content is not None and ingredient in content) or ingredient in corpus['ingredients']
 
-    def _instruction_in_rag_context(self, instruction: str, rag_context: List[Dict[str, Any]]) -> bool:
+    def _instruction_in_rag_context(self, instruction: str, corpus: Dict[str, Any]) -> bool:
         """
         Check if an instruction is supported by the RAG context.
 
         Args:
             instruction: The instruction to check
-            rag_context: The RAG context
+            corpus: The search corpus built from the RAG context
 
         Returns:
             True if instruction is supported by context, False otherwise
         """
-        instruction_lower = instruction.lower()
-        for context_item in rag_context:
-            if 'content' in context_item:
-                content = context_item['content'].lower()
-                # Check for common cooking verbs/actions
-                if any(word in content for word in ['cook', 'boil', 'fry', 'bake', 'stir', 'mix', 'add']):
-                    if any(word in instruction_lower for word in ['cook', 'boil', 'fry', 'bake', 'stir', 'mix', 'add']):
-                        return True
-        return False
+        # Supported when the instruction uses a cooking verb/action that the context also mentions
+        return bool(corpus['cooking_verb_mask'] & _cooking_verb_mask(instruction.lower()))
 
-    def _nutrition_in_rag_context(self, nutrient: str, rag_context: List[Dict[str, Any]]) -> bool:
+    def _nutrition_in_rag_context(self, nutrient: str, corpus: Dict[str, Any]) -> bool:
         """
         Check if nutritional information is supported by the RAG context.
 
         Args:
             nutrient: The nutrient to check
-            rag_context: The RAG context
+            corpus: The search corpus built from the RAG context
 
         Returns:
             True if nutrition info is supported by context, False otherwise
         """
-        nutrient_lower = nutrient.lower()
-        for context_item in rag_context:
-            if 'content' in context_item:
-                content = context_item['content'].lower()
-                if nutrient_lower in content:
-                    return True
-        return False
+        content = corpus['content']
+        return content is not None and nutrient.lower() in content
 
-    def _title_in_rag_context(self, title: str, rag_context: List[Dict[str, Any]]) -> bool:
+    def _title_in_rag_context(self, title: str, corpus: Dict[str, Any]) -> bool:
         """
         Check if recipe title is supported by the RAG context.
 
         Args:
             title: The recipe title to check
-            rag_context: The RAG context
+            corpus: The search corpus built from the RAG context
 
         Returns:
             True if title is supported by context, False otherwise
         """
-        title_lower = title.lower()
-        for context_item in rag_context:
-            if 'content' in context_item:
-                content = context_item['content'].lower()
-                if any(word in content for word in title_lower.split()):
-                    return True
-            if 'title' in context_item:
-                context_title = context_item['title'].lower()
-                if any(word in context_title for word in title_lower.split()):
-                    return True
-        return False
+        words = title.lower().split()
+        content = corpus['content']
+        if content is not None and any(word in content for word in words):
+            return True
+        return any(word in context_title for context_title in corpus['titles'] for word in words)
 
     def filter_hallucinated_ingredients(self, recipe_data: Dict[str, Any], rag_context: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -182,14 +224,14 @@ class RAGValidationService:
         filtered_recipe = recipe_data.copy()
 
         if 'ingredients' in filtered_recipe:
-            valid_ingredients = []
-            for ingredient in filtered_recipe['ingredients']:
-                if isinstance(ingredient, dict):
-                    ingredient_name = ingredient.get('name', '').lower()
-                else:
-                    ingredient_name = str(ingredient).lower()
+            corpus = self._build_search_corpus(rag_context)
+            ingredients = filtered_recipe['ingredients']
+            ingredient_names = [self._ingredient_name(ingredient) for ingredient in ingredients]
+            unsupported = self._unsupported_ingredients(ingredient_names, corpus)
 
-                if self._ingredient_in_rag_context(ingredient_name, rag_context):
+            valid_ingredients = []
+            for ingredient, ingredient_name in zip(ingredients, ingredient_names):
+                if ingredient_name not in unsupported:
                     valid_ingredients.append(ingredient)
                 else:
                     logger.warning(f"Removing hallucinated ingredient: {ingredient}")
@@ -199,5 +241,12 @@ class RAGValidationService:
         return filtered_recipe
 
 
-# Global instance
-rag_validation_service = RAGValidationService()
\ No newline at end of file
+@functools.lru_cache(maxsize=1)
+def get_rag_validation_service() -> RAGValidationService:
+    """
+    Get the RAG validation service, creating it on first use.
+
+    Returns:
+        RAGValidationService instance
+    """
+    return RAGValidationService()
\ No newline at end of file
@@ -1,13 +1,72 @@
 """
 Service for extracting structured recipe data from AI-generated text using Gemini API.
 """
+import asyncio
+import copy
+import functools
 import google.generativeai as genai
 import os
+from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional
+
+import orjson
 from dotenv import load_dotenv
 
+from src.utils.json_span import extract_json_span
+from src.utils.llm_cache import LLMResponseCache, make_cache_key
+
 load_dotenv()
 
+# Successful extractions, keyed by the input text and model
+_extraction_cache = LLMResponseCache(maxsize=512, ttl=3600)
+
+# Values used for extracted fields that are missing, null or empty
+_EXTRACTION_DEFAULTS = {
+    'nutrition_info': {},
+    'tips_variations': [],
+    'tags': [],
+    'author': 'AI Generated',
+    'prep_time': 0,
+    'cook_time': 0,
+    'servings': 1,
+    'difficulty': 'medium',
+    'ingredients': [],
+    'instructions': [],
+}
+
+# Fixed parts of the extraction prompt; only the recipe text between them varies per call
+_EXTRACTION_PROMPT_PREFIX = '''
+        Please analyze the following recipe text and extract the information into a structured JSON format.
+        Pay careful attention to extract ALL the following fields exactly as specified:
+        
+        - title: The recipe title (should be just the name of the dish, not including introductory text)
+        - description: A brief description of the dish (typically the sentence that starts with "This is" or "This dish combines" or similar)
+        - ingredients: An array of objects, each with 'name', 'quantity', and 'preparation' fields (e.g., [{"name": "beef", "quantity": "1 lb", "preparation": "cut into bite-sized pieces"}])
+        - instructions: An array of strings representing the cooking steps (each step should be a separate array element)
+        - prep_time: Preparation time in minutes as an integer (extract from text like "Prep time: 15 minutes" - return just the number)
+        - cook_time: Cooking time in minutes as an integer (extract from text like "Cook time: 45-60 minutes" - use the first number or average)
+        - total_time: Total time in minutes as an integer (prep_time + cook_time)
+        - servings: Number of servings as an integer (extract from text like "Yields: 4 servings" - return just the number)
+        - difficulty: Difficulty level as a string ("easy", "medium", or "hard") - infer from context if not explicitly stated
+        - nutrition_info: Object with nutritional information (can be empty object {})
+        - tips_variations: Array of strings with tips and variations (extract from "Variations:" section)
+        - author: Set to "AI Generated"
+        - tags: Array of relevant tags (e.g., "Main Dish", "Beef", etc. based on ingredients)
+        
+        Here is the recipe text to analyze:
+        '''
+
+_EXTRACTION_PROMPT_SUFFIX = '''
+        
+        IMPORTANT: 
+        - Return ONLY the JSON data with no additional text, explanations, or markdown formatting
+        - Make sure all time fields are integers, not strings
+        - Make sure servings is an integer, not a string
+        - Make sure ingredients are objects with name, quantity, and preparation fields
+        - Make sure instructions are an array of individual steps
+        - If a value is not found, return null for numbers or empty arrays/objects as appropriate
+        '''
+
 class RecipeExtractionService:
     """
     Service class for using Gemini API to extract structured recipe data from AI-generated text.
@@ -34,9 +93,14 @@ class RecipeExtractionService:
                 print("Warning: gemini-1.5-pro not available, trying gemini-pro...")
                 self.model = genai.GenerativeModel("gemini-pro")
 
+        # Per-text locks so concurrent extractions of the same text coalesce
+        self._inflight_locks: Dict[str, asyncio.Lock] = {}
+
     async def extract_recipe_from_text(self, ai_response: str) -> Dict[str, Any]:
         """
         Extract structured recipe data from AI-generated text using Gemini API.
+        Repeat extractions of the same text are served from an in-memory cache, and
+        concurrent requests for the same text share a single Gemini call.
         
         Args:
             ai_response: The raw AI response text containing recipe information
@@ -44,138 +108,79 @@ class RecipeExtractionService:
         Returns:
             Dict containing structured recipe data matching the database schema
         """
+        cache_key = make_cache_key({
+            'operation': 'extract',
+            'text': ai_response,
+            'model': self.model.model_name
+        })
+        cached_recipe = _extraction_cache.get(cache_key)
+        if cached_recipe is not None:
+            return cached_recipe
+
+        lock = self._inflight_locks.setdefault(cache_key, asyncio.Lock())
+        try:
+            async with lock:
+                # Another request may have finished the same extraction while we waited
+                cached_recipe = _extraction_cache.get(cache_key)
+                if cached_recipe is not None:
+                    return cached_recipe
+                return await self._extract_recipe(ai_response, cache_key)
+        finally:
+            if not lock.locked():
+                self._inflight_locks.pop(cache_key, None)
+
+    async def _extract_recipe(self, ai_response: str, cache_key: str) -> Dict[str, Any]:
+        """
+        Run the Gemini extraction, caching successful results under cache_key.
+        """
         # Create a prompt to extract structured data
-        prompt = f'''
-        Please analyze the following recipe text and extract the information into a structured JSON format.
-        Pay careful attention to extract ALL the following fields exactly as specified:
-        
-        - title: The recipe title (should be just the name of the dish, not including introductory text)
-        - description: A brief description of the dish (typically the sentence that starts with "This is" or "This dish combines" or similar)
-        - ingredients: An array of objects, each with 'name', 'quantity', and 'preparation' fields (e.g., [{{"name": "beef", "quantity": "1 lb", "preparation": "cut into bite-sized pieces"}}])
-        - instructions: An array of strings representing the cooking steps (each step should be a separate array element)
-        - prep_time: Preparation time in minutes as an integer (extract from text like "Prep time: 15 minutes" - return just the number)
-        - cook_time: Cooking time in minutes as an integer (extract from text like "Cook time: 45-60 minutes" - use the first number or average)
-        - total_time: Total time in minutes as an integer (prep_time + cook_time)
-        - servings: Number of servings as an integer (extract from text like "Yields: 4 servings" - return just the number)
-        - difficulty: Difficulty level as a string ("easy", "medium", or "hard") - infer from context if not explicitly stated
-        - nutrition_info: Object with nutritional information (can be empty object {{}})
-        - tips_variations: Array of strings with tips and variations (extract from "Variations:" section)
-        - author: Set to "AI Generated"
-        - tags: Array of relevant tags (e.g., "Main Dish", "Beef", etc. based on ingredients)
-        
-        Here is the recipe text to analyze:
-        {ai_response}
-        
-        IMPORTANT: 
-        - Return ONLY the JSON data with no additional text, explanations, or markdown formatting
-        - Make sure all time fields are integers, not strings
-        - Make sure servings is an integer, not a string
-        - Make sure ingredients are objects with name, quantity, and preparation fields
-        - Make sure instructions are an array of individual steps
-        - If a value is not found, return null for numbers or empty arrays/objects as appropriate
-        '''
+        prompt = "".join((_EXTRACTION_PROMPT_PREFIX, ai_response, _EXTRACTION_PROMPT_SUFFIX))
         
         try:
-            response = self.model.generate_content(prompt)
+            response = await self.model.generate_content_async(prompt)
             
             # Extract the JSON from the response
             response_text = response.text.strip()
             
-            # Find JSON within triple backticks if present
-            import re
-            json_match = re.search(r'```(?:json)?\s*({.*?})\s*```', response_text, re.DOTALL)
-            if json_match:
-                response_text = json_match.group(1)
-            else:
-                # If no backticks, try to find JSON object in the response
-                # Look for content between curly braces
-                brace_pattern = r'\{.*\}'
-                brace_match = re.search(brace_pattern, response_text, re.DOTALL)
-                if brace_match:
-                    response_text = brace_match.group(0)
-            
-            # Import json here to avoid circular imports
-            import json
-            recipe_data = json.loads(response_text)
+            # Find the JSON object, inside triple backticks if present
+            json_span = extract_json_span(response_text)
+            if json_span is not None:
+                response_text = json_span
+
+            recipe_data = orjson.loads(response_text)
             
             # Debug logging to see what data is being extracted
             print(f"DEBUG: Extracted recipe data: {recipe_data}")
             
-            # Ensure required fields have proper defaults
-            recipe_data.setdefault('nutrition_info', {})
-            recipe_data.setdefault('tips_variations', [])
-            recipe_data.setdefault('tags', [])
-            recipe_data.setdefault('author', 'AI Generated')
-            
-            # Set default values for time fields if not provided
-            if recipe_data.get('prep_time') is None:
-                recipe_data['prep_time'] = 0
-            if recipe_data.get('cook_time') is None:
-                recipe_data['cook_time'] = 0
+            # Fill defaults for missing, null or empty fields in one merge
+            recipe_data = {
+                **copy.deepcopy(_EXTRACTION_DEFAULTS),
+                **{
+                    key: value for key, value in recipe_data.items()
+                    if not (key in _EXTRACTION_DEFAULTS and (value is None or value == ''))
+                },
+            }
+
             if recipe_data.get('total_time') is None:
                 recipe_data['total_time'] = recipe_data['prep_time'] + recipe_data['cook_time']
-                
-            # Set default servings if not provided
-            if recipe_data.get('servings') is None:
-                recipe_data['servings'] = 1
-                
-            # Set default difficulty if not provided
-            if recipe_data.get('difficulty') is None:
-                recipe_data['difficulty'] = 'medium'
-                
+
             # Set default description if not provided
             if not recipe_data.get('description'):
                 recipe_data['description'] = f"A delicious {recipe_data.get('title', 'recipe')} for your cooking pleasure."
-                
-            # Set default ingredients and instructions if not provided
-            if not recipe_data.get('ingredients'):
-                recipe_data['ingredients'] = []
-            if not recipe_data.get('instructions'):
-                recipe_data['instructions'] = []
-                
+
             # Ensure date fields are properly set
-            from datetime import datetime
+            now = datetime.now(timezone.utc).isoformat(timespec='seconds')
             if not recipe_data.get('generated_at'):
-                recipe_data['generated_at'] = datetime.utcnow().isoformat()
+                recipe_data['generated_at'] = now
             if not recipe_data.get('updated_at'):
-                recipe_data['updated_at'] = datetime.utcnow().isoformat()
-            
-            # Ensure all time fields are integers
-            if recipe_data.get('prep_time') is None:
-                recipe_data['prep_time'] = 0
-            if recipe_data.get('cook_time') is None:
-                recipe_data['cook_time'] = 0
-            if recipe_data.get('total_time') is None:
-                recipe_data['total_time'] = recipe_data['prep_time'] + recipe_data['cook_time']
-            
-            # Ensure servings is an integer
-            if recipe_data.get('servings') is None:
-                recipe_data['servings'] = 1
-            
-            # Ensure difficulty is a string
-            if not recipe_data.get('difficulty'):
-                recipe_data['difficulty'] = 'medium'
-            
-            # Ensure arrays are initialized
-            if not recipe_data.get('ingredients'):
-                recipe_data['ingredients'] = []
-            if not recipe_data.get('instructions'):
-                recipe_data['instructions'] = []
-            if not recipe_data.get('tips_variations'):
-                recipe_data['tips_variations'] = []
-            if not recipe_data.get('tags'):
-                recipe_data['tags'] = []
-            
-            # Ensure description exists
-            if not recipe_data.get('description'):
-                recipe_data['description'] = f"A delicious {recipe_data.get('title', 'recipe')} for your cooking pleasure."
-                
+                recipe_data['updated_at'] = now
+
+            _extraction_cache.set(cache_key, recipe_data)
             return recipe_data
             
         except Exception as e:
             print(f"Error extracting recipe from text: {e}")
-            # Import datetime here to avoid issues
-            from datetime import datetime
+            now = datetime.now(timezone.utc).isoformat(timespec='seconds')
             # Return a minimal structure in case of error
             return {
                 'title': 'New Recipe',
@@ -197,9 +202,28 @@ class RecipeExtractionService:
                 'public': False,
                 'user_id': 'unknown',
                 'username': 'Anonymous Chef',
-                'generated_at': datetime.utcnow().isoformat(),
-                'updated_at': datetime.utcnow().isoformat()
+                'generated_at': now,
+                'updated_at': now
             }
 
-# Global instance
-recipe_extraction_service = RecipeExtractionService()
\ No newline at end of file
+    async def extract_many(self, ai_responses: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extract structured recipe data from several AI responses concurrently.
+
+        Args:
+            ai_responses: Raw AI response texts containing recipe information
+
+        Returns:
+            List of structured recipe dicts, in the same order as the inputs
+        """
+        return await asyncio.gather(*(self.extract_recipe_from_text(text) for text in ai_responses))
+
+@functools.lru_cache(maxsize=1)
+def get_recipe_extraction_service() -> RecipeExtractionService:
+    """
+    Get the recipe extraction service, creating it (and configuring Gemini) on first use.
+
+    Returns:
+        RecipeExtractionService instance
+    """
+    return RecipeExtractionService()
\ No newline at end of file
@@ -1,12 +1,137 @@
 from sqlalchemy.orm import Session
+from database.session import commit_without_expiring
 from ..models.recipe_card import RecipeCard
 from datetime import datetime
-import json
+from typing import List
 import uuid
 import logging
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Markdown bold marker stripped from saved instructions
+_BOLD = '**'
+
+
+def _dumps(value) -> str:
+    """Serialize a value to a JSON string for the recipe card's JSON-encoded fields."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _as_json(value, default) -> str:
+    """
+    Get the JSON string for a recipe card field.
+    Values the caller already serialized (JSON str or bytes) are stored as-is without
+    re-encoding once they parse to the default's type; anything else, including
+    malformed JSON, falls back to the empty default.
+    """
+    # Common case first: the value already has the field's type
+    if isinstance(value, type(default)):
+        return _dumps(value)
+    if isinstance(value, (str, bytes)):
+        try:
+            parsed = orjson.loads(value)
+        except orjson.JSONDecodeError:
+            return _dumps(default)
+        if isinstance(parsed, type(default)):
+            # orjson has validated the text, so bytes are known to be valid UTF-8
+            return value.decode() if isinstance(value, bytes) else value
+    return _dumps(default)
+
+
+def _build_recipe_row(recipe_data: dict, user_id: str, is_public: bool) -> dict:
+    """
+    Build a recipe_cards row from recipe data, keyed by column name
+
+    Args:
+        recipe_data: Dictionary containing recipe information
+        user_id: ID of the user saving the recipe
+        is_public: Whether the recipe should be publicly visible
+
+    Returns:
+        dict: Column values for a new RecipeCard, including a fresh id
+    """
+    # The mapping below is written out field by field; bind the lookup once
+    get = recipe_data.get
+
+    # Generate a unique ID for the recipe
+    recipe_id = f"recipe_{uuid.uuid4().hex}"
+
+    # Prepare the recipe data with safe defaults
+    title = get('title', 'Untitled Recipe')
+    description = get('description', '') or get('reasoning', '')  # Use description first, then reasoning as fallback
+
+    # Ensure ingredients and instructions are properly formatted
+    ingredients = get('ingredients', [])
+    ingredients_json = _as_json(ingredients, [])
+
+    # Clean up instructions by removing bold markers (**)
+    raw_instructions = get('instructions', [])
+    if isinstance(raw_instructions, list):
+        cleaned_instructions = [
+            instruction.replace(_BOLD, '').strip() if isinstance(instruction, str) else instruction
+            for instruction in raw_instructions
+        ]
+        instructions_json = _dumps(cleaned_instructions)
+    else:
+        instructions_json = _as_json(raw_instructions, [])
+
+    # Prepare nutrition info - check for multiple possible field names
+    nutrition_info = (
+        get('nutrition_info', {}) or 
+        get('nutritionInfo', {}) or 
+        get('nutrition', {}) or 
+        {}
+    )
+    nutrition_info_json = _as_json(nutrition_info, {})
+
+    # Prepare other arrays - check for multiple possible field names for variations
+    variations = (
+        get('variations', []) or 
+        get('tips_variations', []) or 
+        get('tipsVariations', []) or 
+        get('tips_and_variations', []) or 
+        []
+    )
+    variations_json = _as_json(variations, [])
+
+    images = get('images', [])
+    images_json = _as_json(images, [])
+
+    tags = get('tags', [])
+    tags_json = _as_json(tags, [])
+
+    customization_notes = get('customizationNotes', [])
+    customization_notes_json = _as_json(customization_notes, [])
+
+    rag_context = get('ragContext', {})
+    rag_context_json = _as_json(rag_context, {})
+
+    return dict(
+        id=recipe_id,
+        title=title,
+        description=description,  # Use the description field instead of reasoning
+        ingredients=ingredients_json,
+        instructions=instructions_json,
+        prep_time=get('prepTime'),
+        cook_time=get('cookingTime'),
+        total_time=get('totalTime') or (get('prepTime', 0) + get('cookingTime', 0)),
+        servings=get('servings'),
+        difficulty=get('difficulty'),
+        nutrition_info=nutrition_info_json,
+        tips_variations=variations_json,
+        author=get('author', 'AI Generated'),
+        images=images_json,
+        tags=tags_json,
+        customization_notes=customization_notes_json,
+        source_recipe_id=get('sourceRecipeId'),
+        rag_context=rag_context_json,
+        user_id=user_id,  # Set the user ID
+        public=is_public  # Set the public visibility
+    )
+
+
 def save_recipe_to_db(db: Session, recipe_data: dict, user_id: str, is_public: bool = False):
     """
     Save a recipe to the database
@@ -21,115 +146,45 @@ def save_recipe_to_db(db: Session, recipe_data: dict, user_id: str, is_public: b
         RecipeCard: The saved recipe object
     """
     try:
-        # Generate a unique ID for the recipe
-        recipe_id = f"recipe_{uuid.uuid4().hex}"
-
-        # Prepare the recipe data with safe defaults
-        title = recipe_data.get('title', 'Untitled Recipe')
-        description = recipe_data.get('description', '') or recipe_data.get('reasoning', '')  # Use description first, then reasoning as fallback
-
-        # Ensure ingredients and instructions are properly formatted
-        ingredients = recipe_data.get('ingredients', [])
-        if isinstance(ingredients, list):
-            ingredients_json = json.dumps(ingredients)
-        else:
-            ingredients_json = json.dumps([])
-
-        # Clean up instructions by removing bold markers (**)
-        raw_instructions = recipe_data.get('instructions', [])
-        if isinstance(raw_instructions, list):
-            cleaned_instructions = []
-            for instruction in raw_instructions:
-                if isinstance(instruction, str):
-                    # Remove leading/trailing ** markers
-                    cleaned_instruction = instruction.replace('**', '').strip()
-                    cleaned_instructions.append(cleaned_instruction)
-                else:
-                    cleaned_instructions.append(instruction)
-            instructions_json = json.dumps(cleaned_instructions)
-        else:
-            instructions_json = json.dumps([])
-
-        # Prepare nutrition info - check for multiple possible field names
-        nutrition_info = (
-            recipe_data.get('nutrition_info', {}) or 
-            recipe_data.get('nutritionInfo', {}) or 
-            recipe_data.get('nutrition', {}) or 
-            {}
-        )
-        if isinstance(nutrition_info, dict):
-            nutrition_info_json = json.dumps(nutrition_info)
-        else:
-            nutrition_info_json = json.dumps({})
-
-        # Prepare other arrays - check for multiple possible field names for variations
-        variations = (
-            recipe_data.get('variations', []) or 
-            recipe_data.get('tips_variations', []) or 
-            recipe_data.get('tipsVariations', []) or 
-            recipe_data.get('tips_and_variations', []) or 
-            []
-        )
-        if isinstance(variations, list):
-            variations_json = json.dumps(variations)
-        else:
-            variations_json = json.dumps([])
-
-        images = recipe_data.get('images', [])
-        if isinstance(images, list):
-            images_json = json.dumps(images)
-        else:
-            images_json = json.dumps([])
-
-        tags = recipe_data.get('tags', [])
-        if isinstance(tags, list):
-            tags_json = json.dumps(tags)
-        else:
-            tags_json = json.dumps([])
-
-        customization_notes = recipe_data.get('customizationNotes', [])
-        if isinstance(customization_notes, list):
-            customization_notes_json = json.dumps(customization_notes)
-        else:
-            customization_notes_json = json.dumps([])
-
-        rag_context = recipe_data.get('ragContext', {})
-        if isinstance(rag_context, dict):
-            rag_context_json = json.dumps(rag_context)
-        else:
-            rag_context_json = json.dumps({})
-
-        # Create the recipe object
-        recipe = RecipeCard(
-            id=recipe_id,
-            title=title,
-            description=description,  # Use the description field instead of reasoning
-            ingredients=ingredients_json,
-            instructions=instructions_json,
-            prep_time=recipe_data.get('prepTime'),
-            cook_time=recipe_data.get('cookingTime'),
-            total_time=recipe_data.get('totalTime') or (recipe_data.get('prepTime', 0) + recipe_data.get('cookingTime', 0)),
-            servings=recipe_data.get('servings'),
-            difficulty=recipe_data.get('difficulty'),
-            nutrition_info=nutrition_info_json,
-            tips_variations=variations_json,
-            author=recipe_data.get('author', 'AI Generated'),
-            images=images_json,
-            tags=tags_json,
-            customization_notes=customization_notes_json,
-            source_recipe_id=recipe_data.get('sourceRecipeId'),
-            rag_context=rag_context_json,
-            user_id=user_id,  # Set the user ID
-            public=is_public  # Set the public visibility
-        )
+        recipe = RecipeCard(**_build_recipe_row(recipe_data, user_id, is_public))
 
+        # Every column except the generated_at server default is set client-side, so keep
+        # the instance loaded after commit instead of re-SELECTing it
         db.add(recipe)
-        db.commit()
-        db.refresh(recipe)
+        commit_without_expiring(db)
 
-        logger.info(f"Successfully saved recipe {recipe_id} for user {user_id}")
+        logger.info(f"Successfully saved recipe {recipe.id} for user {user_id}")
         return recipe
     except Exception as e:
         logger.error(f"Error saving recipe to database: {str(e)}")
         db.rollback()
-        raise e
\ No newline at end of file
+        raise e
+
+
+def save_recipes_to_db(db: Session, recipes_data: List[dict], user_id: str, is_public: bool = False) -> List[str]:
+    """
+    Save several recipes to the database with one batched INSERT and a single commit
+
+    Args:
+        db: Database session
+        recipes_data: Dictionaries containing recipe information
+        user_id: ID of the user saving the recipes
+        is_public: Whether the recipes should be publicly visible
+
+    Returns:
+        List[str]: IDs of the saved recipes, in the same order as recipes_data
+    """
+    try:
+        rows = [_build_recipe_row(recipe_data, user_id, is_public) for recipe_data in recipes_data]
+        if not rows:
+            return []
+
+        db.bulk_insert_mappings(RecipeCard, rows)
+        db.commit()
+
+        logger.info(f"Successfully saved {len(rows)} recipes for user {user_id}")
+        return [row['id'] for row in rows]
+    except Exception as e:
+        logger.error(f"Error saving recipes to database: {str(e)}")
+        db.rollback()
+        raise e
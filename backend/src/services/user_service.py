@@ -1,24 +1,76 @@
+from sqlalchemy import Row, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
+from database.session import commit_without_expiring
 from typing import Optional
 from ..models.user import User
+from ..utils.ttl_cache import TTLCache
 import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Primary keys of recently looked-up users, keyed by "email:<email>" / "user_id:<user_id>".
+# Only the pk is cached so no ORM object outlives its session. Sessions are per-request,
+# so a hit usually still costs a SELECT by pk; it is free only when the same session
+# already loaded the user (db.get answers from its identity map).
+_user_pk_cache = TTLCache(maxsize=4096, ttl=30)
+
+def _cache_user_pk(user: Optional[User]):
+    """Remember the primary key of a user under both of its lookup keys"""
+    if user is not None:
+        _user_pk_cache.set(f"email:{user.email}", user.id)
+        _user_pk_cache.set(f"user_id:{user.user_id}", user.id)
+
+def _invalidate_user(email: str, user_id: Optional[str] = None):
+    """Drop cached lookups for a user"""
+    _user_pk_cache.delete(f"email:{email}")
+    if user_id:
+        _user_pk_cache.delete(f"user_id:{user_id}")
+
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """Get user by email address"""
     try:
-        return db.query(User).filter(User.email == email).first()
+        pk = _user_pk_cache.get(f"email:{email}")
+        if pk is not None:
+            # Lookup by pk (served from the identity map if this session already loaded the
+            # user); falls through to the query if the row has gone
+            user = db.get(User, pk)
+            if user is not None and user.email == email:
+                return user
+        user = db.query(User).filter(User.email == email).first()
+        _cache_user_pk(user)
+        return user
     except Exception as e:
         logger.error(f"Error getting user by email: {e}")
         return None
 
+def get_user_auth_row(db: Session, email: str) -> Optional[Row]:
+    """
+    Get the auth-relevant columns (user_id, is_verified, provider) of a user by email.
+    Selecting only these lets PostgreSQL answer from the ix_users_email_cover
+    covering index without touching the table or building a User object.
+    """
+    try:
+        return db.execute(
+            select(User.user_id, User.is_verified, User.provider).where(User.email == email)
+        ).first()
+    except Exception as e:
+        logger.error(f"Error getting user auth row by email: {e}")
+        return None
+
 def get_user_by_id(db: Session, user_id: str) -> Optional[User]:
     """Get user by user_id"""
     try:
-        return db.query(User).filter(User.user_id == user_id).first()
+        pk = _user_pk_cache.get(f"user_id:{user_id}")
+        if pk is not None:
+            user = db.get(User, pk)
+            if user is not None and user.user_id == user_id:
+                return user
+        user = db.query(User).filter(User.user_id == user_id).first()
+        _cache_user_pk(user)
+        return user
     except Exception as e:
         logger.error(f"Error getting user by ID: {e}")
         return None
@@ -34,15 +86,10 @@ def create_user(
     """Create a new user in the database"""
     try:
         # Generate a consistent user_id based on email to ensure consistency across sessions
-        user_id = f"user_{hashlib.sha256(email.encode()).hexdigest()[:16]}"
-
-        # Check if user already exists to avoid duplicates
-        existing_user = db.query(User).filter(User.email == email).first()
-        if existing_user:
-            logger.info(f"User with email {email} already exists")
-            return existing_user
+        user_id = f"user_{hashlib.blake2b(email.encode('utf-8'), digest_size=8).hexdigest()}"
 
-        user = User(
+        # Insert unless the email is taken, in one round trip; RETURNING is empty on conflict
+        stmt = insert(User).values(
             user_id=user_id,
             email=email,
             username=username or email.split('@')[0],
@@ -50,15 +97,21 @@ def create_user(
             provider=provider,
             provider_id=provider_id,
             is_verified=(provider == 'google'),  # Social accounts are verified by default
-        )
+        ).on_conflict_do_nothing(index_elements=[User.email]).returning(User)
+
+        # RETURNING already loaded every column, so keep it loaded through the commit
+        user = db.scalars(stmt).first()
+        commit_without_expiring(db)
+        _invalidate_user(email, user_id)
 
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        if user is None:
+            logger.info(f"User with email {email} already exists")
+            return get_user_by_email(db, email)
 
         logger.info(f"Created user with ID: {user.user_id} and email: {email}")
         return user
     except IntegrityError as e:
+        # Another unique column (e.g. username) collided
         logger.error(f"Integrity error creating user: {e}")
         db.rollback()
         # Return existing user if it already exists
@@ -81,6 +134,7 @@ def update_user_provider_info(
             user.provider = provider
             user.provider_id = provider_id
             db.commit()
+            _invalidate_user(email, user.user_id)
             db.refresh(user)
             logger.info(f"Updated provider info for user {user.user_id}")
             return user
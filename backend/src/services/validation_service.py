@@ -1,6 +1,118 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Tuple
 import re
 from datetime import datetime
+from itertools import islice
+
+# Allowed values for the enumerated preference fields ('' clears the field)
+_VALID_DIETS = frozenset({
+    'omnivore', 'vegetarian', 'vegan', 'pescatarian',
+    'keto', 'paleo', 'gluten-free', 'dairy-free', ''
+})
+_VALID_SKILL_LEVELS = frozenset({'beginner', 'intermediate', 'advanced', 'expert', ''})
+_VALID_TIME_PREFS = frozenset({'quick', 'moderate', 'slow', ''})
+_VALID_GENDERS = frozenset({'male', 'female', 'other', 'prefer-not-to-say', ''})
+
+_DIET_ERR = f"Diet must be one of: {', '.join(sorted(_VALID_DIETS))}"
+_SKILL_LEVEL_ERR = f"Skill level must be one of: {', '.join(sorted(_VALID_SKILL_LEVELS))}"
+_TIME_PREF_ERR = f"Time preference must be one of: {', '.join(sorted(_VALID_TIME_PREFS))}"
+_GENDER_ERR = f"Gender must be one of: {', '.join(sorted(_VALID_GENDERS))}"
+
+# Enumerated preference fields: field -> (allowed values, error message)
+_ENUM_FIELDS = {
+    'diet': (_VALID_DIETS, _DIET_ERR),
+    'skill_level': (_VALID_SKILL_LEVELS, _SKILL_LEVEL_ERR),
+    'cooking_time_preference': (_VALID_TIME_PREFS, _TIME_PREF_ERR),
+    'gender': (_VALID_GENDERS, _GENDER_ERR),
+}
+
+# Array-of-strings preference fields: (field, label for the field, label for one item)
+_STRING_LIST_FIELDS = (
+    ('allergies', 'Allergies', 'Allergy'),
+    ('likes_dislikes', 'Likes/dislikes', 'Item'),
+    ('cuisine_preferences', 'Cuisine preferences', 'Cuisine'),
+    ('health_conditions', 'Health conditions', 'Condition'),
+    ('ingredient_avoidance', 'Ingredient avoidance', 'Ingredient'),
+)
+
+_MISSING = object()
+
+# Recipe fields that must be present and non-empty, and those that must be non-negative numbers
+_REQUIRED_RECIPE_FIELDS = ('title', 'ingredients', 'instructions')
+_NUMERICAL_RECIPE_FIELDS = ('prep_time', 'cook_time', 'total_time', 'servings')
+
+
+def _iter_string_list_errors(preferences: Dict[str, Any], field: str,
+                             field_label: str, item_label: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield errors for a preference field that, if present, must be a list of non-empty strings.
+
+    Args:
+        preferences: Dictionary containing user preferences
+        field: Preference field to validate
+        field_label: Name of the field used in error messages
+        item_label: Name of a single item used in error messages
+
+    Returns:
+        Iterator of (field, error message) pairs
+    """
+    value = preferences.get(field, _MISSING)
+    if value is _MISSING:
+        return
+    if not isinstance(value, list):
+        yield field, f"{field_label} must be an array of strings"
+        return
+    for i, item in enumerate(value):
+        if not isinstance(item, str):
+            yield field, f"{item_label} at index {i} must be a string"
+        elif not item.strip():
+            yield field, f"{item_label} at index {i} cannot be empty"
+
+
+def _iter_preference_errors(preferences: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    """
+    Yield validation errors for user preferences lazily, so callers can stop at the first one.
+
+    Args:
+        preferences: Dictionary containing user preferences
+
+    Returns:
+        Iterator of (field, error message) pairs
+    """
+    # Validate enumerated fields
+    for field, (allowed, error_message) in _ENUM_FIELDS.items():
+        value = preferences.get(field, _MISSING)
+        if value is not _MISSING and value not in allowed:
+            yield field, error_message
+
+    # Validate age
+    if 'age' in preferences:
+        try:
+            age = int(preferences['age'])
+            if age < 0 or age > 150:
+                yield 'age', "Age must be between 0 and 150"
+        except (ValueError, TypeError):
+            yield 'age', "Age must be a valid number"
+
+    # Validate calorie goal
+    if 'calorie_goal' in preferences:
+        try:
+            calorie_goal = int(preferences['calorie_goal'])
+            if calorie_goal < 0:
+                yield 'calorie_goal', "Calorie goal must be a positive number"
+        except (ValueError, TypeError):
+            yield 'calorie_goal', "Calorie goal must be a valid number"
+
+    # Validate array-of-strings fields
+    for field, field_label, item_label in _STRING_LIST_FIELDS:
+        yield from _iter_string_list_errors(preferences, field, field_label, item_label)
+
+    # Validate doctor restrictions
+    if 'doctor_restrictions' in preferences:
+        if not isinstance(preferences['doctor_restrictions'], str):
+            yield 'doctor_restrictions', "Doctor restrictions must be a string"
+        elif len(preferences['doctor_restrictions']) > 1000:  # Limit length
+            yield 'doctor_restrictions', "Doctor restrictions must be less than 1000 characters"
+
 
 class ProfileValidationService:
     """
@@ -20,135 +132,22 @@ class ProfileValidationService:
             Dictionary of validation errors, keyed by field name
         """
         errors = {}
+        for field, message in _iter_preference_errors(preferences):
+            errors.setdefault(field, []).append(message)
+        return errors
 
-        # Validate diet preference
-        if 'diet' in preferences:
-            valid_diets = {
-                'omnivore', 'vegetarian', 'vegan', 'pescatarian',
-                'keto', 'paleo', 'gluten-free', 'dairy-free', ''
-            }
-            if preferences['diet'] not in valid_diets:
-                errors['diet'] = [f"Diet must be one of: {', '.join(valid_diets)}"]
-
-        # Validate skill level
-        if 'skill_level' in preferences:
-            valid_skill_levels = {'beginner', 'intermediate', 'advanced', 'expert', ''}
-            if preferences['skill_level'] not in valid_skill_levels:
-                errors['skill_level'] = [f"Skill level must be one of: {', '.join(valid_skill_levels)}"]
-
-        # Validate cooking time preference
-        if 'cooking_time_preference' in preferences:
-            valid_time_prefs = {'quick', 'moderate', 'slow', ''}
-            if preferences['cooking_time_preference'] not in valid_time_prefs:
-                errors['cooking_time_preference'] = [f"Time preference must be one of: {', '.join(valid_time_prefs)}"]
-
-        # Validate gender
-        if 'gender' in preferences:
-            valid_genders = {'male', 'female', 'other', 'prefer-not-to-say', ''}
-            if preferences['gender'] not in valid_genders:
-                errors['gender'] = [f"Gender must be one of: {', '.join(valid_genders)}"]
-
-        # Validate age
-        if 'age' in preferences:
-            try:
-                age = int(preferences['age'])
-                if age < 0 or age > 150:
-                    errors['age'] = ["Age must be between 0 and 150"]
-            except (ValueError, TypeError):
-                errors['age'] = ["Age must be a valid number"]
-
-        # Validate calorie goal
-        if 'calorie_goal' in preferences:
-            try:
-                calorie_goal = int(preferences['calorie_goal'])
-                if calorie_goal < 0:
-                    errors['calorie_goal'] = ["Calorie goal must be a positive number"]
-            except (ValueError, TypeError):
-                errors['calorie_goal'] = ["Calorie goal must be a valid number"]
+    @staticmethod
+    def is_valid_preferences(preferences: Dict[str, Any]) -> bool:
+        """
+        Check whether user preferences are valid, stopping at the first error.
 
-        # Validate allergies (array of strings)
-        if 'allergies' in preferences:
-            if not isinstance(preferences['allergies'], list):
-                errors['allergies'] = ["Allergies must be an array of strings"]
-            else:
-                for i, allergy in enumerate(preferences['allergies']):
-                    if not isinstance(allergy, str):
-                        if 'allergies' not in errors:
-                            errors['allergies'] = []
-                        errors['allergies'].append(f"Allergy at index {i} must be a string")
-                    elif len(allergy.strip()) == 0:
-                        if 'allergies' not in errors:
-                            errors['allergies'] = []
-                        errors['allergies'].append(f"Allergy at index {i} cannot be empty")
-
-        # Validate likes/dislikes (array of strings)
-        if 'likes_dislikes' in preferences:
-            if not isinstance(preferences['likes_dislikes'], list):
-                errors['likes_dislikes'] = ["Likes/dislikes must be an array of strings"]
-            else:
-                for i, item in enumerate(preferences['likes_dislikes']):
-                    if not isinstance(item, str):
-                        if 'likes_dislikes' not in errors:
-                            errors['likes_dislikes'] = []
-                        errors['likes_dislikes'].append(f"Item at index {i} must be a string")
-                    elif len(item.strip()) == 0:
-                        if 'likes_dislikes' not in errors:
-                            errors['likes_dislikes'] = []
-                        errors['likes_dislikes'].append(f"Item at index {i} cannot be empty")
-
-        # Validate cuisine preferences (array of strings)
-        if 'cuisine_preferences' in preferences:
-            if not isinstance(preferences['cuisine_preferences'], list):
-                errors['cuisine_preferences'] = ["Cuisine preferences must be an array of strings"]
-            else:
-                for i, cuisine in enumerate(preferences['cuisine_preferences']):
-                    if not isinstance(cuisine, str):
-                        if 'cuisine_preferences' not in errors:
-                            errors['cuisine_preferences'] = []
-                        errors['cuisine_preferences'].append(f"Cuisine at index {i} must be a string")
-                    elif len(cuisine.strip()) == 0:
-                        if 'cuisine_preferences' not in errors:
-                            errors['cuisine_preferences'] = []
-                        errors['cuisine_preferences'].append(f"Cuisine at index {i} cannot be empty")
-
-        # Validate health conditions (array of strings)
-        if 'health_conditions' in preferences:
-            if not isinstance(preferences['health_conditions'], list):
-                errors['health_conditions'] = ["Health conditions must be an array of strings"]
-            else:
-                for i, condition in enumerate(preferences['health_conditions']):
-                    if not isinstance(condition, str):
-                        if 'health_conditions' not in errors:
-                            errors['health_conditions'] = []
-                        errors['health_conditions'].append(f"Condition at index {i} must be a string")
-                    elif len(condition.strip()) == 0:
-                        if 'health_conditions' not in errors:
-                            errors['health_conditions'] = []
-                        errors['health_conditions'].append(f"Condition at index {i} cannot be empty")
-
-        # Validate doctor restrictions
-        if 'doctor_restrictions' in preferences:
-            if not isinstance(preferences['doctor_restrictions'], str):
-                errors['doctor_restrictions'] = ["Doctor restrictions must be a string"]
-            elif len(preferences['doctor_restrictions']) > 1000:  # Limit length
-                errors['doctor_restrictions'] = ["Doctor restrictions must be less than 1000 characters"]
-
-        # Validate ingredient avoidance (array of strings)
-        if 'ingredient_avoidance' in preferences:
-            if not isinstance(preferences['ingredient_avoidance'], list):
-                errors['ingredient_avoidance'] = ["Ingredient avoidance must be an array of strings"]
-            else:
-                for i, ingredient in enumerate(preferences['ingredient_avoidance']):
-                    if not isinstance(ingredient, str):
-                        if 'ingredient_avoidance' not in errors:
-                            errors['ingredient_avoidance'] = []
-                        errors['ingredient_avoidance'].append(f"Ingredient at index {i} must be a string")
-                    elif len(ingredient.strip()) == 0:
-                        if 'ingredient_avoidance' not in errors:
-                            errors['ingredient_avoidance'] = []
-                        errors['ingredient_avoidance'].append(f"Ingredient at index {i} cannot be empty")
+        Args:
+            preferences: Dictionary containing user preferences
 
-        return errors
+        Returns:
+            True if validate_preferences would report no errors
+        """
+        return next(_iter_preference_errors(preferences), None) is None
 
     @staticmethod
     def sanitize_preferences(preferences: Dict[str, Any]) -> Dict[str, Any]:
@@ -197,11 +196,9 @@ class ProfileValidationService:
         for field in array_fields:
             if field in preferences:
                 if isinstance(preferences[field], list):
-                    # Remove empty strings and sanitize each entry
-                    sanitized[field] = [
-                        item.strip()[:100] for item in preferences[field]
-                        if isinstance(item, str) and item.strip()
-                    ][:50]  # Limit to 50 items
+                    # Remove empty strings and sanitize each entry, stopping after 50 items
+                    stripped = (item.strip()[:100] for item in preferences[field] if isinstance(item, str))
+                    sanitized[field] = list(islice((item for item in stripped if item), 50))
                 else:
                     sanitized[field] = []
 
@@ -226,13 +223,8 @@ class ProfileValidationService:
             return is_valid, sanitized, {}
         else:
             # Still return sanitized data for fields that passed validation
-            partially_sanitized = {}
-            for key, value in preferences.items():
-                if key not in errors:
-                    # This field passed validation, so sanitize it
-                    temp_dict = {key: value}
-                    sanitized_field = ProfileValidationService.sanitize_preferences(temp_dict)
-                    partially_sanitized[key] = sanitized_field[key]
+            sanitized = ProfileValidationService.sanitize_preferences(preferences)
+            partially_sanitized = {key: value for key, value in sanitized.items() if key not in errors}
 
             return is_valid, partially_sanitized, errors
 
@@ -255,70 +247,55 @@ class RecipeValidationService:
             Dictionary of validation errors, keyed by field name
         """
         errors = {}
+        add_errors = errors.setdefault
 
         # Validate required fields
-        required_fields = ['title', 'ingredients', 'instructions']
-        for field in required_fields:
-            if field not in recipe_data or not recipe_data[field]:
-                if field not in errors:
-                    errors[field] = []
-                errors[field].append(f"{field} is required and cannot be empty")
+        for field in _REQUIRED_RECIPE_FIELDS:
+            if not recipe_data.get(field):
+                add_errors(field, []).append(f"{field} is required and cannot be empty")
 
         # Validate title
         if 'title' in recipe_data:
-            if not isinstance(recipe_data['title'], str) or len(recipe_data['title'].strip()) == 0:
-                if 'title' not in errors:
-                    errors['title'] = []
-                errors['title'].append("Title must be a non-empty string")
-            elif len(recipe_data['title']) > 200:
-                if 'title' not in errors:
-                    errors['title'] = []
-                errors['title'].append("Title must be less than 200 characters")
+            title = recipe_data['title']
+            if not isinstance(title, str) or not title.strip():
+                add_errors('title', []).append("Title must be a non-empty string")
+            elif len(title) > 200:
+                add_errors('title', []).append("Title must be less than 200 characters")
 
         # Validate ingredients
         if 'ingredients' in recipe_data:
-            if not isinstance(recipe_data['ingredients'], list):
+            ingredients = recipe_data['ingredients']
+            if not isinstance(ingredients, list):
                 errors['ingredients'] = ["Ingredients must be an array"]
             else:
-                for i, ingredient in enumerate(recipe_data['ingredients']):
+                for i, ingredient in enumerate(ingredients):
                     if isinstance(ingredient, str):
                         # If it's a string, it's fine
                         continue
                     elif isinstance(ingredient, dict):
                         # If it's an object, it should have expected fields
-                        if 'name' not in ingredient or not ingredient['name']:
-                            if 'ingredients' not in errors:
-                                errors['ingredients'] = []
-                            errors['ingredients'].append(f"Ingredient at index {i} must have a name")
+                        if not ingredient.get('name'):
+                            add_errors('ingredients', []).append(f"Ingredient at index {i} must have a name")
                     else:
-                        if 'ingredients' not in errors:
-                            errors['ingredients'] = []
-                        errors['ingredients'].append(f"Ingredient at index {i} must be a string or object")
+                        add_errors('ingredients', []).append(f"Ingredient at index {i} must be a string or object")
 
         # Validate instructions
         if 'instructions' in recipe_data:
-            if not isinstance(recipe_data['instructions'], list):
+            instructions = recipe_data['instructions']
+            if not isinstance(instructions, list):
                 errors['instructions'] = ["Instructions must be an array"]
             else:
-                for i, instruction in enumerate(recipe_data['instructions']):
-                    if not isinstance(instruction, str) or len(instruction.strip()) == 0:
-                        if 'instructions' not in errors:
-                            errors['instructions'] = []
-                        errors['instructions'].append(f"Instruction at index {i} must be a non-empty string")
+                for i, instruction in enumerate(instructions):
+                    if not isinstance(instruction, str) or not instruction.strip():
+                        add_errors('instructions', []).append(f"Instruction at index {i} must be a non-empty string")
 
         # Validate numerical fields
-        numerical_fields = ['prep_time', 'cook_time', 'total_time', 'servings']
-        for field in numerical_fields:
+        for field in _NUMERICAL_RECIPE_FIELDS:
             if field in recipe_data:
                 try:
-                    value = int(recipe_data[field])
-                    if value < 0:
-                        if field not in errors:
-                            errors[field] = []
-                        errors[field].append(f"{field} must be a non-negative number")
+                    if int(recipe_data[field]) < 0:
+                        add_errors(field, []).append(f"{field} must be a non-negative number")
                 except (ValueError, TypeError):
-                    if field not in errors:
-                        errors[field] = []
-                    errors[field].append(f"{field} must be a valid number")
+                    add_errors(field, []).append(f"{field} must be a valid number")
 
         return errors
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Locate JSON objects embedded in LLM output (code fences, surrounding prose).
+"""
+from typing import Optional
+
+
+def _first_balanced_object(text: str) -> Optional[str]:
+    """
+    Return the first balanced {...} span in the text, or None if there is none.
+
+    Scans once, tracking brace depth and skipping braces inside JSON strings, so it
+    never backtracks and stops at the end of the first object.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+def extract_json_span(text: str) -> Optional[str]:
+    """
+    Return the first balanced JSON object in the text, looking inside a ``` code fence if present.
+
+    Falls back to scanning the whole text when the first fence holds no complete object
+    (e.g. a fenced note followed by unfenced JSON).
+    """
+    fence_start = text.find('```')
+    if fence_start != -1:
+        fence_end = text.find('```', fence_start + 3)
+        if fence_end != -1:
+            span = _first_balanced_object(text[fence_start + 3:fence_end])
+            if span is not None:
+                return span
+    return _first_balanced_object(text)
@@ -0,0 +1,36 @@
+"""
+In-memory caching utilities for LLM responses.
+
+Provides a thread-safe TTL + LRU cache for exact-match reuse of Gemini results.
+"""
+import hashlib
+from typing import Any, Dict
+
+import orjson
+
+from src.utils.ttl_cache import TTLCache
+
+
+def make_cache_key(payload: Dict[str, Any]) -> str:
+    """
+    Build a stable cache key for a JSON-serializable payload.
+
+    Args:
+        payload: The request inputs that fully determine the LLM response
+
+    Returns:
+        Hex digest identifying the payload
+    """
+    serialized = orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    # Keys only need collision resistance, not secrecy, so use the faster BLAKE2b
+    return hashlib.blake2b(serialized, digest_size=16).hexdigest()
+
+
+class LLMResponseCache(TTLCache):
+    """
+    TTL + LRU cache for LLM results.
+    Stored values are copied on the way in and out, so callers may mutate results freely.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl: float = 3600):
+        super().__init__(maxsize=maxsize, ttl=ttl, copy_values=True)
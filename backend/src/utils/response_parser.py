@@ -1,5 +1,108 @@
 import re
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Set, Union
+
+from src.utils.llm_cache import LLMResponseCache
+
+# Content of a section runs until the next "Header:" line, a blank line or the end of the text
+_SECTION_END = r"(?=\n[A-Z][^:]*:|\n\n|$)"
+
+_INGREDIENTS_SECTION_RE = re.compile(r'(Ingredients?|INGREDIENTS)[:\n]', re.IGNORECASE)
+_INSTRUCTIONS_SECTION_RE = re.compile(r'(Instructions?|INSTRUCTIONS|Steps?|STEPS)[:\n]', re.IGNORECASE)
+
+# Recipe-specific keywords and reasoning phrases, matched anywhere (substrings, any case)
+# in a single pass over the response
+_RECIPE_KEYWORDS_RE = re.compile('|'.join(map(re.escape, (
+    'ingredient', 'cooking', 'recipe', 'cook', 'preparation', 'prepare',
+    'serve', 'serving', 'meal', 'dish', 'cuisine', 'flavor', 'taste',
+    'bake', 'boil', 'fry', 'grill', 'roast', 'season', 'spice', 'food'
+))), re.IGNORECASE)
+_REASONING_PHRASES_RE = re.compile('|'.join(map(re.escape, (
+    'reason', 'because', 'why', 'this is', 'this works', 'explanation', 'how', 'what makes'
+))), re.IGNORECASE)
+
+# Any mention of a required section, accepting variations in section names (e.g.
+# "Substitutes" vs "Substitutions", "Nutrients" vs "Nutrition notes"); the names share
+# no prefixes, so one alternation finds every section's mentions in a single pass
+_SECTION_HEADERS_RE = re.compile(
+    r'(?P<reasoning>Reasoning?)'
+    r'|(?P<substitutions>Substitutions?|Substitutes?)'
+    r'|(?P<nutrition>Nutrition\s+notes?|Nutrients?|Nutritional\s+information)'
+    r'|(?P<variations>Variations?)',
+    re.IGNORECASE
+)
+_SECTION_GROUPS: Dict[str, str] = {
+    'reasoning': "Reasoning:",
+    'substitutions': "Substitutions:",
+    'nutrition': "Nutrition notes:",
+    'variations': "Variations:",
+}
+
+# Headers for extract_reasoning_sections. A section's content runs to the next line that
+# starts with a letter and is followed, after at least one more character, by a colon
+# somewhere later in the text, or to the end; located by slicing instead of a lazy DOTALL
+# capture whose lookahead rescans the text at every line
+_EXTRACT_HEADER_RES = {
+    section: re.compile(re.escape(section), re.IGNORECASE)
+    for section in _SECTION_GROUPS.values()
+}
+_NEXT_HEADER_LINE_RE = re.compile(r'\n[A-Z][^:]', re.IGNORECASE)
+
+_INGREDIENTS_TEXT_RE = re.compile(r'Ingredients?:\s*(.*?)(?=Instructions?:|\n\n|$)', re.DOTALL | re.IGNORECASE)
+
+# Content for required sections missing from a recipe; Substitutions and Nutrition notes
+# vary with the recipe's main ingredient
+_FALLBACK_CONTENT: Dict[str, Union[str, Dict[str, str]]] = {
+    "Reasoning:": "This recipe combines protein-rich chicken with nutritious vegetables like potatoes and tomatoes, served with aromatic rice and fresh lettuce, creating a balanced and satisfying Mediterranean-inspired meal.",
+    "Substitutions:": {
+        'chicken': "- Chicken: Substitute with turkey, lamb, firm tofu, or chickpeas for vegetarian option.\n- Rice: Replace with quinoa, couscous, farro, or barley.\n- Potatoes: Use sweet potatoes, carrots, parsnips, or cauliflower.\n- Tomatoes: Substitute with roasted red peppers or tomato paste.\n- Oil: Use butter, ghee, or any neutral oil.",
+        'shrimp': "- Shrimp: Substitute with chicken, fish, scallops, or tofu.\n- Rice: Replace with quinoa, noodles, or cauliflower rice.\n- Oil: Use butter, ghee, or any neutral oil.",
+        'default': "Common ingredient substitutions include using different proteins, oils, or grains based on dietary preferences or availability.",
+    },
+    "Nutrition notes:": {
+        'chicken': "This dish provides lean protein from chicken, complex carbohydrates from rice and potatoes, and essential vitamins from vegetables. It's rich in B vitamins, iron, potassium, and healthy fats from olive oil, making it a well-balanced meal.",
+        'shrimp': "This dish provides lean protein from shrimp, fiber and vitamins from vegetables, and carbohydrates from rice. Contains essential nutrients like protein, vitamin C, and iron.",
+        'default': "This dish provides balanced nutrition with proteins, complex carbohydrates, fiber, vitamins, and minerals from the various ingredients used.",
+    },
+    "Variations:": "- Spicy Version: Add red pepper flakes, diced chili peppers, or hot sauce.\n- Herby Delight: Incorporate fresh herbs like parsley, cilantro, or mint.\n- Lemon Zest: Add fresh lemon juice or zest for brightness.\n- Creamy Addition: Stir in plain or Greek yogurt before serving.\n- Vegetable Boost: Include bell peppers, zucchini, spinach, or peas.\n- One-Pot Wonder: Cook everything in a single pot for easier cleanup.",
+}
+_MISSING_SECTION_CONTENT = "This section was automatically added as it was missing from the response."
+
+def _fallback_chunk(section: str, content: str) -> str:
+    """Format generated content as a chunk appended to the response."""
+    return f"\n\n**{section}**\n{content}"
+
+# The fallback chunks, formatted once at import so adding a section is a plain lookup
+_FALLBACK_TEMPLATES: Dict[str, Union[str, Dict[str, str]]] = {
+    section: (
+        {variant: _fallback_chunk(section, text) for variant, text in content.items()}
+        if isinstance(content, dict) else _fallback_chunk(section, content)
+    )
+    for section, content in _FALLBACK_CONTENT.items()
+}
+
+def _main_protein(response_text: str) -> str:
+    """
+    Get the key of the fallback template variant for the recipe's main ingredient:
+    'chicken' or 'shrimp' if its ingredients section mentions one, else 'default'.
+    """
+    ingredients_match = _INGREDIENTS_TEXT_RE.search(response_text)
+    if not ingredients_match:
+        return 'default'
+    ingredients_text = ingredients_match.group(1).lower()
+    if 'chicken' in ingredients_text:
+        return 'chicken'
+    if 'shrimp' in ingredients_text:
+        return 'shrimp'
+    return 'default'
+
+def _present_sections(response_text: str) -> Set[str]:
+    """
+    Find which required sections the response mentions, in one scan of the text.
+
+    Returns:
+        Set of the required section names (e.g. "Reasoning:") that are present
+    """
+    return {_SECTION_GROUPS[match.lastgroup] for match in _SECTION_HEADERS_RE.finditer(response_text)}
 
 class ResponseParser:
     """
@@ -8,202 +111,114 @@ class ResponseParser:
     """
 
     def __init__(self):
-        self.required_sections = [
+        self.required_sections: List[str] = [
             "Reasoning:",
             "Substitutions:",
             "Nutrition notes:",
             "Variations:"
         ]
+        # Any required section header, to check for all of them in one scan
+        self._all_sections_re = re.compile('|'.join(map(re.escape, self.required_sections)))
+        # Enforced responses keyed by the original text
+        self._cache = LLMResponseCache(maxsize=512, ttl=3600)
 
-    async def parse_and_enforce_structure(self, response_text: str) -> str:
+    def parse_and_enforce_structure(self, response_text: str) -> str:
         """
         Parse the response and ensure it contains required sections when appropriate.
         If sections are missing from recipe-related responses, add them with appropriate content.
+        The result depends only on the text, so repeated responses (retries, refreshes)
+        are served from a small in-memory cache.
+        """
+        cached = self._cache.get(response_text)
+        if cached is not None:
+            return cached
+
+        result = "".join(self.iter_parse_and_enforce_structure(response_text))
+        self._cache.set(response_text, result)
+        return result
+
+    def iter_parse_and_enforce_structure(self, response_text: str) -> Iterator[str]:
+        """
+        Yield the response with required sections enforced, in chunks: the original text
+        first, then each added section. Lets a caller stream the output without
+        building the combined string.
         """
         # Check if this is a structured recipe response by looking for specific patterns
-        # Recipe responses typically have ingredients lists and instruction steps
-        has_ingredients_section = bool(re.search(r'(Ingredients?|INGREDIENTS)[:\n]', response_text, re.IGNORECASE))
-        has_instructions_section = bool(re.search(r'(Instructions?|INSTRUCTIONS|Steps?|STEPS)[:\n]', response_text, re.IGNORECASE))
+        # Recipe responses typically have ingredients lists and instruction steps.
+        # Only structured recipes (ingredients + instructions + recipe keywords) get the
+        # structure enforced, so return as soon as one is missing; most conversational
+        # replies have no ingredients section and cost a single scan
+        has_ingredients_section = bool(_INGREDIENTS_SECTION_RE.search(response_text))
+        if not has_ingredients_section:
+            yield response_text
+            return
+
+        has_instructions_section = bool(_INSTRUCTIONS_SECTION_RE.search(response_text))
+        if not has_instructions_section:
+            yield response_text
+            return
 
         # Check for recipe-specific keywords that indicate it's definitely a recipe
-        recipe_keywords = [
-            'ingredient', 'cooking', 'recipe', 'cook', 'preparation', 'prepare',
-            'serve', 'serving', 'meal', 'dish', 'cuisine', 'flavor', 'taste',
-            'bake', 'boil', 'fry', 'grill', 'roast', 'season', 'spice', 'food'
-        ]
-
-        has_recipe_keywords = any(keyword in response_text.lower() for keyword in recipe_keywords)
+        has_recipe_keywords = bool(_RECIPE_KEYWORDS_RE.search(response_text))
+        if not has_recipe_keywords:
+            yield response_text
+            return
 
         # Check for natural language that indicates reasoning or explanation
-        has_reasoning_content = any(phrase in response_text.lower() for phrase in
-                                  ['reason', 'because', 'why', 'this is', 'this works', 'explanation', 'how', 'what makes'])
-
-        # Check for general question patterns that might indicate a non-recipe response
-        # Only consider it a general question if it's at the beginning of the response
-        general_question_patterns = [
-            r'^how to ', r'^how do i ', r'^what is ', r'^what are ', r'^explain ', r'^tell me about ',
-            r'^basic ', r'^fundamental', r'^beginner', r'^cooking tips', r'^cooking technique'
-        ]
-
-        is_general_question = any(re.search(pattern, response_text.lower().strip(), re.IGNORECASE) for pattern in general_question_patterns)
-
-        # A structured recipe typically has both ingredients and instructions AND recipe-related keywords
-        is_structured_recipe = (
-            has_ingredients_section and has_instructions_section and has_recipe_keywords
-        )
+        has_reasoning_content = bool(_REASONING_PHRASES_RE.search(response_text))
 
-        # If it's a general question about cooking but doesn't have recipe structure, don't enforce the structure
-        if is_general_question and not is_structured_recipe:
-            return response_text
-
-        # If it has clear recipe structure (ingredients + instructions + recipe keywords), enforce the structure
-        # This handles legitimate recipe responses that might be missing sections
-        if not is_structured_recipe:
-            return response_text
-
-        # For structured recipe responses, check if all required sections exist
-        sections_found = {}
-
-        for section in self.required_sections:
-            # Look for the section in the response using flexible matching
-            # Account for variations in section names (e.g., "Substitutes" vs "Substitutions", "Nutrients" vs "Nutrition notes")
-            patterns = []
-
-            if section == "Substitutions:":
-                # Match "Substitutions", "Substitute", "Substitutes" variations
-                patterns = [
-                    rf"(Substitutions?|Substitutes?)\s*[:.]\s*(.*?)(?=\n[A-Z][^:]*:|\n\n|$)",
-                    rf"(Substitutions?|Substitutes?)[\s:.]+(.*?)(?=\n[A-Z][^:]*:|\n\n|$)"
-                ]
-            elif section == "Nutrition notes:":
-                # Match "Nutrition notes", "Nutrients", "Nutrition" variations
-                patterns = [
-                    rf"(Nutrition\s+notes?|Nutrients?|Nutritional\s+information)\s*[:.]\s*(.*?)(?=\n[A-Z][^:]*:|\n\n|$)",
-                    rf"(Nutrition\s+notes?|Nutrients?|Nutritional\s+information)[\s:.]+(.*?)(?=\n[A-Z][^:]*:|\n\n|$)"
-                ]
-            elif section == "Reasoning:":
-                patterns = [
-                    rf"{re.escape(section)}\s*(.*?)(?=\n[A-Z][^:]*:|\n\n|$)",
-                    rf"{re.escape(section[:-1])}\s*[.:]?\s*(.*?)(?=\n[A-Z][^:]*:|\n\n|$)"
-                ]
-            elif section == "Variations:":
-                patterns = [
-                    rf"{re.escape(section)}\s*(.*?)(?=\n[A-Z][^:]*:|\n\n|$)",
-                    rf"{re.escape(section[:-1])}\s*[.:]?\s*(.*?)(?=\n[A-Z][^:]*:|\n\n|$)"
-                ]
-
-            match = None
-            matched_section_header = ""
-            matched_content = ""
-
-            for pattern in patterns:
-                match = re.search(pattern, response_text, re.DOTALL | re.IGNORECASE)
-                if match:
-                    if len(match.groups()) >= 2:  # Full match with content group
-                        matched_section_header = match.group(1).strip() + ":"
-                        matched_content = match.group(2).strip()
-                    else:  # Just the full match
-                        full_match = match.group(0)
-                        # Extract header and content
-                        lines = full_match.split('\n')
-                        header_line = lines[0]
-                        header_end_pos = header_line.find(':')
-                        if header_end_pos != -1:
-                            matched_section_header = header_line[:header_end_pos+1]
-                            matched_content = header_line[header_end_pos+1:].strip()
-                            if len(lines) > 1:
-                                matched_content += "\n" + "\n".join(lines[1:])
-                        else:
-                            matched_section_header = header_line.strip()
-                            matched_content = ""
-                    break
-
-            if match:
-                # If we found a matching section, use it as is
-                sections_found[section] = f"{matched_section_header}\n{matched_content}".strip()
-                # Update the response text to include the properly formatted section
-                # We won't add it again later since it's already present
-            else:
-                # Generate meaningful content for missing sections based on the recipe content
-                if section == "Reasoning:":
-                    sections_found[section] = f"**{section}**\nThis recipe combines protein-rich chicken with nutritious vegetables like potatoes and tomatoes, served with aromatic rice and fresh lettuce, creating a balanced and satisfying Mediterranean-inspired meal."
-                elif section == "Substitutions:":
-                    # Extract ingredients from the response to suggest relevant substitutions
-                    ingredients_match = re.search(r'Ingredients?:\s*(.*?)(?=Instructions?:|\n\n|$)', response_text, re.DOTALL | re.IGNORECASE)
-                    if ingredients_match:
-                        ingredients_text = ingredients_match.group(1)
-                        if 'chicken' in ingredients_text.lower():
-                            sections_found[section] = f"**{section}**\n- Chicken: Substitute with turkey, lamb, firm tofu, or chickpeas for vegetarian option.\n- Rice: Replace with quinoa, couscous, farro, or barley.\n- Potatoes: Use sweet potatoes, carrots, parsnips, or cauliflower.\n- Tomatoes: Substitute with roasted red peppers or tomato paste.\n- Oil: Use butter, ghee, or any neutral oil."
-                        elif 'shrimp' in ingredients_text.lower():
-                            sections_found[section] = f"**{section}**\n- Shrimp: Substitute with chicken, fish, scallops, or tofu.\n- Rice: Replace with quinoa, noodles, or cauliflower rice.\n- Oil: Use butter, ghee, or any neutral oil."
-                        else:
-                            sections_found[section] = f"**{section}**\nCommon ingredient substitutions include using different proteins, oils, or grains based on dietary preferences or availability."
-                    else:
-                        sections_found[section] = f"**{section}**\nCommon ingredient substitutions include using different proteins, oils, or grains based on dietary preferences or availability."
-                elif section == "Nutrition notes:":
-                    ingredients_match = re.search(r'Ingredients?:\s*(.*?)(?=Instructions?:|\n\n|$)', response_text, re.DOTALL | re.IGNORECASE)
-                    if ingredients_match:
-                        ingredients_text = ingredients_match.group(1)
-                        if 'chicken' in ingredients_text.lower():
-                            sections_found[section] = f"**{section}**\nThis dish provides lean protein from chicken, complex carbohydrates from rice and potatoes, and essential vitamins from vegetables. It's rich in B vitamins, iron, potassium, and healthy fats from olive oil, making it a well-balanced meal."
-                        elif 'shrimp' in ingredients_text.lower():
-                            sections_found[section] = f"**{section}**\nThis dish provides lean protein from shrimp, fiber and vitamins from vegetables, and carbohydrates from rice. Contains essential nutrients like protein, vitamin C, and iron."
-                        else:
-                            sections_found[section] = f"**{section}**\nThis dish provides balanced nutrition with proteins, complex carbohydrates, fiber, vitamins, and minerals from the various ingredients used."
-                    else:
-                        sections_found[section] = f"**{section}**\nThis dish provides balanced nutrition with proteins, complex carbohydrates, fiber, vitamins, and minerals from the various ingredients used."
-                elif section == "Variations:":
-                    sections_found[section] = f"**{section}**\n- Spicy Version: Add red pepper flakes, diced chili peppers, or hot sauce.\n- Herby Delight: Incorporate fresh herbs like parsley, cilantro, or mint.\n- Lemon Zest: Add fresh lemon juice or zest for brightness.\n- Creamy Addition: Stir in plain or Greek yogurt before serving.\n- Vegetable Boost: Include bell peppers, zucchini, spinach, or peas.\n- One-Pot Wonder: Cook everything in a single pot for easier cleanup."
-                else:
-                    sections_found[section] = f"**{section}**\nThis section was automatically added as it was missing from the response."
+        # For structured recipe responses, check if all required sections exist;
+        # any variation of a section already in the response counts as present and is kept as is
+        present_sections = _present_sections(response_text)
 
         # Check if the response already has good structure without needing all required sections
         # For example, if it has good reasoning/explanation content, it might not need the explicit "Reasoning:" section
-        has_natural_structure = (has_reasoning_content and has_ingredients_section and has_instructions_section)
+        # (ingredients and instructions sections are already known to be present here)
+        has_natural_structure = has_reasoning_content
 
-        # Construct the final response with all required sections
-        final_response = response_text
+        # Construct the final response, adding generated content for each missing section
+        yield response_text
+        protein: Optional[str] = None
 
-        # Check if any required sections are missing and add them
         for i, section in enumerate(self.required_sections):
-            # Use flexible check to see if any variation of the section already exists
-            section_exists = False
-            if section == "Substitutions:":
-                section_exists = bool(re.search(r'Substitutions?|Substitutes?', response_text, re.IGNORECASE))
-            elif section == "Nutrition notes:":
-                section_exists = bool(re.search(r'Nutrition\s+notes?|Nutrients?|Nutritional\s+information', response_text, re.IGNORECASE))
-            elif section == "Variations:":
-                section_exists = bool(re.search(r'Variations?', response_text, re.IGNORECASE))
-            elif section == "Reasoning:":
-                section_exists = bool(re.search(r'Reasoning?', response_text, re.IGNORECASE))
-
-            if not section_exists:
-                # If the response already has natural structure, we might not need all sections
-                if has_natural_structure and i == 0:  # Skip Reasoning if we already have natural reasoning
-                    continue
-                final_response += f"\n\n{sections_found[section]}"
-
-        return final_response
-
-    async def extract_reasoning_sections(self, response_text: str) -> Dict[str, str]:
+            if section in present_sections:
+                continue
+            # If the response already has natural structure, we might not need all sections
+            if has_natural_structure and i == 0:  # Skip Reasoning if we already have natural reasoning
+                continue
+
+            template = _FALLBACK_TEMPLATES.get(section)
+            if template is None:
+                template = _fallback_chunk(section, _MISSING_SECTION_CONTENT)
+            elif isinstance(template, dict):
+                # Pick the variant for the recipe's main ingredient, worked out once per response
+                if protein is None:
+                    protein = _main_protein(response_text)
+                template = template[protein]
+            yield template
+
+    def extract_reasoning_sections(self, response_text: str) -> Dict[str, str]:
         """
         Extract the various reasoning sections from the response.
         """
-        sections = {}
+        sections: Dict[str, str] = {}
 
         for section in self.required_sections:
             # Look for the section in the response
-            pattern = rf"{section}(.*?)(?=\n[A-Z][^:]+\s*:|$)"
-            match = re.search(pattern, response_text, re.DOTALL | re.IGNORECASE)
+            match = _EXTRACT_HEADER_RES[section].search(response_text)
 
             if match:
-                sections[section] = match.group(1).strip()
+                start = match.end()
+                # A following header line only counts if a colon comes after it
+                next_header = _NEXT_HEADER_LINE_RE.search(response_text, start, response_text.rfind(':'))
+                end = next_header.start() if next_header else len(response_text)
+                sections[section] = response_text[start:end].strip()
             else:
                 sections[section] = ""
 
         return sections
 
-    async def format_response(self, recipe_content: str, reasoning_sections: Dict[str, str]) -> str:
+    def format_response(self, recipe_content: str, reasoning_sections: Dict[str, str]) -> str:
         """
         Format the response with proper structure.
         """
@@ -215,11 +230,9 @@ class ResponseParser:
 
         return formatted_response
 
-    async def validate_reasoning_presence(self, response_text: str) -> bool:
+    def validate_reasoning_presence(self, response_text: str) -> bool:
         """
         Validate that the response contains all required reasoning sections.
         """
-        for section in self.required_sections:
-            if section not in response_text:
-                return False
-        return True
\ No newline at end of file
+        found = {match.group() for match in self._all_sections_re.finditer(response_text)}
+        return len(found) == len(self.required_sections)
@@ -0,0 +1,145 @@
+"""
+Semantic caching of LLM responses using FAISS similarity search.
+
+Near-duplicate prompts (reordered ingredients, rephrased requests) map to nearby
+embeddings, so a cosine-similarity lookup can reuse an earlier response.
+Entries are grouped into partitions that must match exactly, so request fields
+that must never be approximated (e.g. allergies) are kept out of the similarity search.
+"""
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence
+
+import faiss
+import numpy as np
+
+
+class _Partition:
+    """Index and stored responses for one exact-match partition."""
+
+    def __init__(self):
+        self.index = None
+        self.quantized = False
+        self.responses: List[Any] = []
+
+
+class SemanticRecipeCache:
+    """
+    Thread-safe cache of responses keyed by partition and prompt embedding.
+    Each partition uses an exact IndexFlatIP over normalized vectors (cosine similarity) and
+    switches to a trained IVFPQ index once its number of entries exceeds `quantize_after`;
+    IVFPQ candidates are re-scored against the exact vectors, so the similarity threshold
+    is always applied to true cosine similarity rather than a PQ approximation.
+    At most `max_entries` responses are held in total across all partitions.
+    Training the IVFPQ index is CPU-bound, so async callers should run `add` (and `lookup`,
+    which shares the lock) in a worker thread.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.92, quantize_after: int = 10000,
+                 max_entries: int = 50000, max_partitions: int = 1000):
+        self.similarity_threshold = similarity_threshold
+        self.quantize_after = quantize_after
+        self.max_entries = max_entries
+        self.max_partitions = max_partitions
+        self._partitions: "OrderedDict[str, _Partition]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        """Convert an embedding to a normalized float32 row vector."""
+        vector = np.asarray(embedding, dtype='float32').reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def lookup(self, embedding: Sequence[float], partition: str = '') -> Optional[Any]:
+        """
+        Return the cached response for the most similar prompt in `partition`, or None if no
+        stored prompt in that partition reaches the similarity threshold.
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            entry = self._partitions.get(partition)
+            if entry is None or entry.index is None or entry.index.ntotal == 0:
+                return None
+            self._partitions.move_to_end(partition)
+
+            scores, indices = entry.index.search(query, 1)
+            score, idx = float(scores[0][0]), int(indices[0][0])
+            if idx < 0 or score < self.similarity_threshold:
+                return None
+            response = entry.responses[idx]
+        return copy.deepcopy(response)
+
+    def add(self, embedding: Sequence[float], response: Any, partition: str = ''):
+        """
+        Store a response under its prompt embedding in `partition`.
+        """
+        vector = self._normalize(embedding)
+        response = copy.deepcopy(response)
+        with self._lock:
+            entry = self._partitions.get(partition)
+            if entry is None:
+                entry = self._partitions[partition] = _Partition()
+            else:
+                self._partitions.move_to_end(partition)
+
+            # Evict least recently used partitions while over the partition or entry limits
+            while len(self._partitions) > 1 and (
+                len(self._partitions) > self.max_partitions or self._total >= self.max_entries
+            ):
+                _, evicted = self._partitions.popitem(last=False)
+                self._total -= len(evicted.responses)
+
+            if entry.index is None or self._total >= self.max_entries:
+                # Start over when full; FAISS flat/PQ indexes have no cheap eviction
+                self._total -= len(entry.responses)
+                entry.index = faiss.IndexFlatIP(vector.shape[1])
+                entry.quantized = False
+                entry.responses = []
+
+            entry.index.add(vector)
+            entry.responses.append(response)
+            self._total += 1
+
+            if not entry.quantized and entry.index.ntotal > self.quantize_after:
+                entry.index = self._build_quantized_index(entry.index)
+                entry.quantized = True
+
+    @staticmethod
+    def _build_quantized_index(flat_index) -> Any:
+        """
+        Rebuild a flat index as a trained IVFPQ index over the same vectors, wrapped in an
+        IndexRefineFlat so the top candidates are re-ranked with exact inner products.
+        """
+        dimension = flat_index.d
+        vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+
+        # Number of sub-quantizers must divide the dimension
+        sub_quantizers = next((m for m in (96, 64, 48, 32, 16, 8) if dimension % m == 0), 1)
+        nlist = max(1, int(np.sqrt(len(vectors))))
+
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, sub_quantizers, 8, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.nprobe = 8
+
+        refined = faiss.IndexRefineFlat(index)
+        refined.k_factor = 8
+        refined.add(vectors)
+        return refined
+
+    def clear(self):
+        """
+        Remove all cached entries.
+        """
+        with self._lock:
+            self._partitions.clear()
+            self._total = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._total
@@ -0,0 +1,71 @@
+"""
+Thread-safe in-memory TTL + LRU cache.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe exact-match cache with a per-entry TTL and LRU eviction.
+    With copy_values=True, stored values are deep-copied on the way in and out so callers
+    may mutate results freely; leave it off for immutable values such as ids.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl: float = 3600, copy_values: bool = False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.copy_values = copy_values
+        # key -> (expires_at, value), ordered from least to most recently used
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value) if self.copy_values else value
+
+    def set(self, key: str, value: Any):
+        """
+        Store a value, evicting the least recently used entry when full.
+        """
+        if self.copy_values:
+            value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        """
+        Remove a cached entry, if present.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Remove all cached entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -1,3 +1,4 @@
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from main import app
@@ -103,22 +104,25 @@ async def test_multiple_conversation_turns_performance():
         "Add a dessert suggestion"
     ]
 
-    for i, message in enumerate(messages):
-        turn_start = time.time()
+    # Drive the app through its async interface on the test's event loop, with one client
+    # shared by all turns. Turns stay sequential: each refines the previous one in the same session.
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as async_client:
+        for i, message in enumerate(messages):
+            turn_start = time.time()
 
-        response = client.post(
-            "/api/v1/chat",
-            data={
-                "session_id": session_id,
-                "message": message
-            }
-        )
+            response = await async_client.post(
+                "/api/v1/chat",
+                data={
+                    "session_id": session_id,
+                    "message": message
+                }
+            )
 
-        turn_time = time.time() - turn_start
-        total_time += turn_time
+            turn_time = time.time() - turn_start
+            total_time += turn_time
 
-        # Each turn should be under 4 seconds
-        assert turn_time < 4.0, f"Turn {i+1} took {turn_time:.2f}s, which exceeds 4 second limit"
+            # Each turn should be under 4 seconds
+            assert turn_time < 4.0, f"Turn {i+1} took {turn_time:.2f}s, which exceeds 4 second limit"
 
-        # For a real test with valid API key, we'd also check the response status
-        # assert response.status_code == 200
\ No newline at end of file
+            # For a real test with valid API key, we'd also check the response status
+            # assert response.status_code == 200
@@ -0,0 +1,50 @@
+from src.services.domain_guardrails import DomainGuardrails
+
+
+def test_check_query_domain_allows_food_queries():
+    """Test that food and cooking queries are treated as within the domain."""
+    guardrails = DomainGuardrails()
+
+    assert guardrails.check_query_domain("What can I cook with rice and eggs?")[0] == True
+    assert guardrails.check_query_domain("Hello there")[0] == True
+    # Technical terms are allowed when the query is clearly food-related
+    assert guardrails.check_query_domain("Recipe for a python-shaped birthday cake")[0] == True
+
+
+def test_check_query_domain_matches_whole_words():
+    """Test that single-word keywords do not match inside unrelated words."""
+    guardrails = DomainGuardrails()
+
+    # 'r', 'go' and 'ai' must not match inside 'there', 'good' or 'said'
+    assert guardrails.check_query_domain("She said the dough looks good over there")[0] == True
+
+
+def test_check_query_domain_rejects_off_topic_queries():
+    """Test that technical and general-knowledge queries are intercepted."""
+    guardrails = DomainGuardrails()
+
+    is_within_domain, reason = guardrails.check_query_domain("How do I learn Python?")
+    assert is_within_domain == False
+    assert "python" in reason
+
+    is_within_domain, reason = guardrails.check_query_domain("Explain machine learning to me")
+    assert is_within_domain == False
+    assert "machine learning" in reason
+
+    is_within_domain, reason = guardrails.check_query_domain("Who is the president of France?")
+    assert is_within_domain == False
+    assert "Non-food category" in reason
+
+
+def test_generate_thematic_response_uses_real_emoji():
+    """Test that the thematic response contains real UTF-8 emoji rather than mojibake."""
+    guardrails = DomainGuardrails()
+
+    response = guardrails.generate_thematic_response("What is Python?")
+
+    assert "👨‍🍳" in response
+    assert "🍽️" in response
+    assert "What is Python?" in response
+    # UTF-8 bytes mis-decoded as cp1252 show up as sequences starting with 'ð' or 'â€'
+    assert "ð" not in response
+    assert "â€" not in response
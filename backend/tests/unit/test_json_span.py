@@ -0,0 +1,31 @@
+from src.utils.json_span import extract_json_span
+
+
+def test_extract_json_span_reads_fenced_object():
+    """Test that an object inside a code fence is returned without the fence or prose."""
+    text = 'Here is the recipe:\n```json\n{"title": "Soup"}\n```\nEnjoy!'
+    assert extract_json_span(text) == '{"title": "Soup"}'
+
+
+def test_extract_json_span_falls_back_when_fence_has_no_object():
+    """Test that JSON after a fence without an object is still found."""
+    text = '```\nnote\n```\n{"a":1}'
+    assert extract_json_span(text) == '{"a":1}'
+
+
+def test_extract_json_span_ignores_braces_inside_strings():
+    """Test that braces inside JSON strings do not change the nesting depth."""
+    text = 'prefix {"tip": "use {fresh} herbs }", "nested": {"b": 2}} suffix'
+    assert extract_json_span(text) == '{"tip": "use {fresh} herbs }", "nested": {"b": 2}}'
+
+
+def test_extract_json_span_handles_escaped_quotes_and_backslashes():
+    """Test that escaped quotes and trailing backslashes inside strings are skipped correctly."""
+    text = r'{"say": "he said \"}\"", "path": "C:\\"} trailing }'
+    assert extract_json_span(text) == r'{"say": "he said \"}\"", "path": "C:\\"}'
+
+
+def test_extract_json_span_returns_none_without_object():
+    """Test that text without a complete object returns None."""
+    assert extract_json_span("no json here") is None
+    assert extract_json_span('{"unterminated": true') is None
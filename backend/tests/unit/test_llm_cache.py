@@ -0,0 +1,35 @@
+from src.utils.llm_cache import LLMResponseCache, make_cache_key
+
+
+def test_make_cache_key_is_order_independent():
+    """Test that cache keys do not depend on dictionary key order."""
+    assert make_cache_key({"a": 1, "b": [1, 2]}) == make_cache_key({"b": [1, 2], "a": 1})
+    assert make_cache_key({"a": 1}) != make_cache_key({"a": 2})
+
+
+def test_llm_response_cache_returns_copies():
+    """Test that cached values cannot be mutated through returned results."""
+    cache = LLMResponseCache(maxsize=10, ttl=60)
+    cache.set("key", {"ingredients": ["rice"]})
+
+    result = cache.get("key")
+    result["ingredients"].append("beans")
+
+    assert cache.get("key") == {"ingredients": ["rice"]}
+
+
+def test_llm_response_cache_evicts_and_expires():
+    """Test LRU eviction when full and expiry after the TTL."""
+    cache = LLMResponseCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # 'a' becomes most recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    expired_cache = LLMResponseCache(maxsize=2, ttl=0)
+    expired_cache.set("a", 1)
+    assert expired_cache.get("a") is None
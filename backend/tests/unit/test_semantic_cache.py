@@ -0,0 +1,67 @@
+import numpy as np
+
+from src.utils.semantic_cache import SemanticRecipeCache
+
+
+def test_semantic_cache_matches_similar_embeddings():
+    """Test that a near-duplicate embedding returns the stored response."""
+    cache = SemanticRecipeCache(similarity_threshold=0.9)
+    cache.add([1.0, 0.0, 0.0], {"title": "Rice Bowl"})
+
+    assert cache.lookup([0.99, 0.05, 0.0]) == {"title": "Rice Bowl"}
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+
+
+def test_semantic_cache_never_matches_across_partitions():
+    """Test that identical embeddings in different partitions do not share responses."""
+    cache = SemanticRecipeCache(similarity_threshold=0.9)
+    cache.add([1.0, 0.0, 0.0], {"title": "Peanut Noodles"}, partition="no-allergies")
+
+    assert cache.lookup([1.0, 0.0, 0.0], partition="peanut-allergy") is None
+    assert cache.lookup([1.0, 0.0, 0.0], partition="no-allergies") == {"title": "Peanut Noodles"}
+
+
+def test_semantic_cache_evicts_least_recently_used_partition():
+    """Test that the oldest partition is dropped once max_partitions is exceeded."""
+    cache = SemanticRecipeCache(similarity_threshold=0.9, max_partitions=2)
+    cache.add([1.0, 0.0], "a", partition="a")
+    cache.add([1.0, 0.0], "b", partition="b")
+    cache.lookup([1.0, 0.0], partition="a")  # 'a' becomes most recently used
+    cache.add([1.0, 0.0], "c", partition="c")
+
+    assert cache.lookup([1.0, 0.0], partition="b") is None
+    assert cache.lookup([1.0, 0.0], partition="a") == "a"
+    assert len(cache) == 2
+
+
+def test_semantic_cache_caps_entries_across_partitions():
+    """Test that max_entries bounds the total number of responses over all partitions."""
+    cache = SemanticRecipeCache(similarity_threshold=0.9, max_entries=3)
+    cache.add([1.0, 0.0], "a", partition="a")
+    cache.add([1.0, 0.0], "b", partition="b")
+    cache.add([0.0, 1.0], "b2", partition="b")
+    cache.add([1.0, 0.0], "c", partition="c")
+
+    assert len(cache) == 3
+    assert cache.lookup([1.0, 0.0], partition="a") is None
+    assert cache.lookup([0.0, 1.0], partition="b") == "b2"
+
+
+def test_semantic_cache_applies_threshold_to_exact_scores_after_quantizing():
+    """Test that quantized partitions compare the exact cosine similarity with the threshold."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(300, 16)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    cache = SemanticRecipeCache(similarity_threshold=0.99, quantize_after=256)
+    for i, vector in enumerate(vectors):
+        cache.add(vector, i)
+
+    assert cache.lookup(vectors[7]) == 7
+
+    # A query at cosine similarity ~0.98 to a stored vector must not match
+    orthogonal = rng.normal(size=16).astype('float32')
+    orthogonal -= orthogonal.dot(vectors[7]) * vectors[7]
+    orthogonal /= np.linalg.norm(orthogonal)
+    near_miss = 0.98 * vectors[7] + np.sqrt(1 - 0.98 ** 2) * orthogonal
+    assert cache.lookup(near_miss) is None
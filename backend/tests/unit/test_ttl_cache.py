@@ -0,0 +1,14 @@
+from src.utils.ttl_cache import TTLCache
+
+
+def test_ttl_cache_stores_values_without_copying_by_default():
+    """Test that values are returned as stored unless copy_values is set."""
+    value = {"id": 1}
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("key", value)
+    assert cache.get("key") is value
+
+    copying = TTLCache(maxsize=10, ttl=60, copy_values=True)
+    copying.set("key", value)
+    assert copying.get("key") == value
+    assert copying.get("key") is not value